@@ -0,0 +1,115 @@
+"""Защита обработчиков от повторов и частых нажатий.
+
+UpdateGuard регистрируется TypeHandler'ом в группе -1, то есть выполняется до
+остальных обработчиков, и останавливает обработку (ApplicationHandlerStop), если:
+- update_id уже обрабатывался (Telegram повторяет доставку webhook, если ответ
+  задержался или был не 200);
+- пользователь нажал кнопку раньше, чем через FLOOD_MIN_INTERVAL секунд после
+  предыдущего принятого нажатия. Такое нажатие не теряется, а откладывается до
+  конца интервала; если за это время пришли ещё нажатия, применяется только
+  последнее (меню приходит в состояние последнего клика), а вытесненные не
+  обрабатываются вовсе - без запросов к БД и правки сообщения. Каждое
+  придержанное нажатие сразу подтверждается (answer), чтобы на кнопке не
+  крутился индикатор; обработчик не подтверждает его повторно (was_answered).
+Команды и текстовые сообщения не ограничиваются: на них всегда есть ответ.
+
+Состояние хранится в памяти процесса, поэтому повторы, пришедшие после рестарта
+или в другой воркер webhook, не отсекаются.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Set
+
+from telegram import Update
+from telegram.ext import Application, ApplicationHandlerStop, ContextTypes
+
+from app.core.config import settings
+from app.core.metrics import UPDATES_SHED
+
+
+class UpdateGuard:
+    def __init__(self, min_interval: float, dedup_size: int):
+        self.min_interval = min_interval
+        self.dedup_size = dedup_size
+        self.stats: Dict[str, int] = {"duplicate": 0, "throttled": 0}
+        self._seen: "OrderedDict[int, None]" = OrderedDict()
+        self._last_accepted: "OrderedDict[int, float]" = OrderedDict()
+        # Отложенное (последнее) нажатие пользователя и update_id, пропускаемые при повторной подаче
+        self._pending: Dict[int, Update] = {}
+        self._replaying: Set[int] = set()
+        self._answered: Set[str] = set()
+
+    @classmethod
+    def from_settings(cls) -> "UpdateGuard":
+        return cls(settings.FLOOD_MIN_INTERVAL, settings.UPDATE_DEDUP_SIZE)
+
+    def is_duplicate(self, update_id: int) -> bool:
+        if update_id in self._seen:
+            return True
+        self._seen[update_id] = None
+        if len(self._seen) > self.dedup_size:
+            self._seen.popitem(last=False)
+        return False
+
+    def _accept(self, user_id: int, now: float) -> None:
+        self._last_accepted.pop(user_id, None)
+        self._last_accepted[user_id] = now
+
+    def is_throttled(self, user_id: int) -> bool:
+        now = time.monotonic()
+        # Записи упорядочены по времени принятия, устаревшие всегда в начале
+        while self._last_accepted:
+            oldest_user, accepted_at = next(iter(self._last_accepted.items()))
+            if now - accepted_at < self.min_interval:
+                break
+            del self._last_accepted[oldest_user]
+        if user_id in self._last_accepted or user_id in self._pending:
+            return True
+        self._accept(user_id, now)
+        return False
+
+    def was_answered(self, query_id: str) -> bool:
+        """True, если callback уже подтверждён UpdateGuard (повторный answer Telegram отклонит)."""
+        if query_id in self._answered:
+            self._answered.discard(query_id)
+            return True
+        return False
+
+    def _count(self, reason: str) -> None:
+        self.stats[reason] += 1
+        UPDATES_SHED.inc(reason)
+
+    async def _apply_later(self, user_id: int, application: Application) -> None:
+        """Дожидается конца интервала и подаёт последнее отложенное нажатие пользователя."""
+        accepted_at = self._last_accepted.get(user_id, time.monotonic())
+        await asyncio.sleep(max(0.0, accepted_at + self.min_interval - time.monotonic()))
+        update = self._pending.pop(user_id, None)
+        if update is None:
+            return
+        self._accept(user_id, time.monotonic())
+        self._replaying.add(update.update_id)
+        await application.process_update(update)
+
+    async def __call__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        # Проверки выполняются без await, поэтому атомарны для event loop
+        if update.update_id in self._replaying:
+            self._replaying.discard(update.update_id)
+            return
+        if self.is_duplicate(update.update_id):
+            self._count("duplicate")
+            raise ApplicationHandlerStop
+        user = update.effective_user
+        query = update.callback_query
+        if query is None or user is None or self.min_interval <= 0 or not self.is_throttled(user.id):
+            return
+        superseded = self._pending.get(user.id)
+        self._pending[user.id] = update
+        if superseded is None:
+            context.application.create_task(self._apply_later(user.id, context.application))
+        else:
+            self._answered.discard(superseded.callback_query.id)
+            self._count("throttled")
+        self._answered.add(query.id)
+        await query.answer()
+        raise ApplicationHandlerStop
@@ -0,0 +1,146 @@
+"""Платформонезависимое меню бота: тексты, кнопки и маршрутизация команд.
+
+Используется обработчиками Telegram (app.bot.telegram_bot) и WhatsApp (app.bot.whatsapp).
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core.content import content_store
+from app.services.cache import UserState
+from app.services.registration import AsyncRegistrationService
+
+# Доступ к БД из обработчиков выполняется в пуле потоков, не блокируя event loop
+registration_service = AsyncRegistrationService()
+
+# Определим данные для кнопок и соответствующие тексты ответов
+# Можно перенести в settings или constants, но для примера оставим здесь
+BUTTONS = {
+    "info": "Информация о форуме",
+    "faq": "Часто задаваемые вопросы",
+    "contact": "Связь и помощь",
+    "register_site": "Как зарегистрироваться на сайте",
+    "reminders_on": "Получать напоминания", # Кнопка для включения напоминаний
+    "reminders_off": "Отключить напоминания", # Кнопка для отключения напоминаний
+}
+
+def _response_inputs() -> tuple:
+    """Значения контента и настроек, от которых зависят тексты ответов."""
+    event = content_store.current.current_event()
+    return (
+        event.date,
+        event.location,
+        event.link,
+        settings.ADMIN_TELEGRAM,
+        settings.ADMIN_EMAIL,
+        settings.ADMIN_PHONE,
+        event.info_template,
+        settings.Messages.SUPPORT_MESSAGE,
+    )
+
+
+@lru_cache(maxsize=4)
+def _build_responses(
+    date, location, link, admin_telegram, admin_email, admin_phone, event_info, support_message
+) -> Dict[str, str]:
+    # Тексты ответов (можно также вынести)
+    return {
+        "info": event_info.format(
+            date=date,
+            location=location,
+            link=link
+        ),
+        "faq": """
+Часто задаваемые вопросы:
+
+• Что такое ESG?
+ESG (Environmental, Social, Governance) - это подход к оценке деятельности компаний, учитывающий экологические, социальные и управленческие факторы.
+
+• Когда и где пройдет форум?
+Форум пройдет {} в {}.
+
+• Как зарегистрироваться на сайте?
+Инструкция по регистрации: [ссылка на инструкцию/сайт]
+
+• Сколько стоит участие?
+Участие в форуме бесплатное, но требуется предварительная регистрация на сайте.
+
+• Как связаться с организаторами?
+Вы можете связаться с организаторами через:
+Telegram: {}
+Email: {}
+Телефон: {}
+""".format(
+            date,
+            location,
+            admin_telegram,
+            admin_email,
+            admin_phone
+        ),
+        "contact": support_message.format(
+            telegram=admin_telegram,
+            email=admin_email,
+            phone=admin_phone
+        ),
+        "register_site": """
+Для регистрации на форум, пожалуйста, перейдите на сайт:
+{}
+
+Следуйте инструкциям на сайте для завершения регистрации.
+""".format(link),
+        "reminders_on_success": "Вы подписались на напоминания о форуме. Я пришлю уведомления за неделю, 3 дня и за день до начала.",
+        "reminders_off_success": "Вы отписались от напоминаний о форуме.",
+        "welcome": """
+Добро пожаловать в бот ESG TECH Forum!
+
+Форум состоится {} в {}.
+
+Я здесь, чтобы предоставить вам информацию о форуме и помочь с регистрацией на нашем сайте.
+
+Выберите один из пунктов меню ниже или воспользуйтесь командами /info, /faq, /contact.
+""".format(date, location)
+    }
+
+
+def get_responses() -> Dict[str, str]:
+    """Тексты ответов; пересобираются, только когда меняется контент или настройки."""
+    return _build_responses(*_response_inputs())
+
+
+# Пункты меню в порядке отображения; последний пункт - управление напоминаниями
+MENU_ITEMS = ["info", "faq", "contact", "register_site"]
+
+
+@dataclass
+class MenuReply:
+    text: str
+    user: Optional[UserState]  # Состояние пользователя для выбора кнопки напоминаний
+
+
+async def handle_command(platform, platform_user_id: str, command: str) -> MenuReply:
+    """Выполняет команду меню для пользователя любой платформы."""
+    if command == "start":
+        # Get or create user in DB
+        user = await registration_service.create_user(platform, platform_user_id)
+        return MenuReply(get_responses()["welcome"], UserState.from_user(user))
+
+    # Обрабатываем нажатия кнопок информации
+    if command in MENU_ITEMS:
+        # Для отрисовки кнопки напоминаний достаточно закэшированного состояния
+        user = await registration_service.get_user_state(platform, platform_user_id)
+        return MenuReply(get_responses().get(command, "Неизвестная информация."), user)
+
+    # Обрабатываем управление напоминаниями.
+    # set_receive_reminders возвращает уже обновлённого пользователя,
+    # поэтому повторно читать его из БД для отрисовки кнопки не нужно
+    if command in ("reminders_on", "reminders_off"):
+        enabled = command == "reminders_on"
+        user = await registration_service.set_receive_reminders(platform, platform_user_id, enabled)
+        if not user:
+            # Если пользователя нет (что маловероятно после /start), создадим его
+            await registration_service.create_user(platform, platform_user_id)
+            user = await registration_service.set_receive_reminders(platform, platform_user_id, enabled)
+        return MenuReply(get_responses()[f"{command}_success"], UserState.from_user(user))
+
+    user = await registration_service.get_user_state(platform, platform_user_id)
+    return MenuReply("Неизвестная команда.", user)
@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from app.core.config import settings
+from app.core.database import init_db, run_in_session
+from app.core.logs import setup_logging
+from app.services.deliveries import DeliveryService
+from app.services.dispatcher import (
+    BulkDispatcher,
+    OutgoingMessage,
+    default_limits,
+    error_code,
+    failure_reason,
+    is_permanent,
+)
+from app.services.notification import NotificationService
+from app.services.senders import close_senders, default_senders
+
+logger = logging.getLogger(__name__)
+
+
+async def process_batch(dispatcher: BulkDispatcher, worker_id: str) -> int:
+    """Берёт пачку сообщений из outbox, отправляет и сохраняет результаты. Возвращает размер пачки."""
+    lease = timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    batch = await run_in_session(
+        lambda db: NotificationService(db).claim_batch(worker_id, settings.OUTBOX_BATCH_SIZE, lease)
+    )
+    if not batch:
+        return 0
+
+    sent_ids = []
+    failed = []
+    unreachable = []
+
+    def on_result(message: OutgoingMessage, ok: bool) -> None:
+        if ok:
+            sent_ids.append(message.payload.id)
+        else:
+            permanent = message.error is not None and is_permanent(message.error)
+            code = error_code(message.error) if message.error is not None else None
+            failed.append((message.payload, repr(message.error), permanent, code))
+            if permanent:
+                unreachable.append((message.platform, message.recipient, failure_reason(message.error)))
+
+    report = await dispatcher.dispatch(
+        (OutgoingMessage(m.platform, m.recipient, m.body, payload=m) for m in batch),
+        on_result,
+    )
+
+    def save(db):
+        service = NotificationService(db)
+        service.mark_sent(sent_ids)
+        for message, error, permanent, code in failed:
+            service.mark_failed(message, error, permanent, code)
+        DeliveryService(db).mark_unreachable_recipients(unreachable)
+
+    await run_in_session(save)
+    logger.info("Outbox: %s", report.summary())
+    return len(batch)
+
+
+async def run_worker(worker_id: str, once: bool = False, workers: int = 1) -> None:
+    """Разбирает outbox, пока не остановят (или до опустошения очереди при once=True).
+
+    workers - сколько воркеров работает параллельно: лимиты частоты общие для токена
+    бота и номера Twilio, поэтому каждый воркер получает 1/workers от них.
+    """
+    limits = default_limits(telegram_share=1 / workers, whatsapp_share=1 / workers)
+    dispatcher = BulkDispatcher(default_senders(), limits=limits)
+    try:
+        while True:
+            processed = await process_batch(dispatcher, worker_id)
+            if not processed:
+                if once:
+                    return
+                await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL)
+    finally:
+        await close_senders()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Воркер отправки сообщений из outbox")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}:{os.getpid()}")
+    parser.add_argument("--once", action="store_true", help="завершиться, когда очередь опустеет")
+    parser.add_argument(
+        "--workers", type=int, default=settings.OUTBOX_WORKERS,
+        help="сколько воркеров запущено всего; лимиты частоты делятся между ними поровну",
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("нужно --workers >= 1")
+
+    setup_logging()
+    init_db()
+    logger.info("Запуск воркера outbox %s (доля лимитов 1/%s)", args.worker_id, args.workers)
+    asyncio.run(run_worker(args.worker_id, args.once, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Встроенный планировщик напоминаний на JobQueue бота (вместо внешнего cron).
+
+Периодическая проверка (каждые REMINDER_CHECK_INTERVAL секунд и сразу при старте)
+вычисляет время отправки ближайшего этапа: время начала мероприятия за N дней до
+него, если оно попадает в окно отправки [REMINDER_WINDOW_START, REMINDER_WINDOW_END),
+иначе начало окна. Если этап должен был уйти сегодня,
+а бот был выключен, рассылка запускается при первой проверке в пределах окна.
+Завершённые этапы (кампании) запоминаются в bot_data, и следующая проверка
+переходит к следующему дню, а не запускает ту же рассылку снова; этап, рассылка
+которого упала целиком, повторяется не больше WAVE_MAX_ATTEMPTS раз.
+Отправка идёт через context.bot, то есть через пул соединений работающего бота.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import AbstractSet, Dict, Optional, Set, Tuple
+
+from telegram.ext import Application, ContextTypes
+
+from app.core.config import settings
+from app.core.content import ContentUnavailable, content_store
+from app.services.reminder_calendar import ReminderCalendar, reminder_calendar, reminder_campaign, stage_starts_at
+from app.services.reminders import send_reminder_wave
+from app.services.senders import default_senders
+from app.utils.dates import local_now, parse_time
+
+logger = logging.getLogger(__name__)
+
+CHECK_JOB_NAME = "reminders_check"
+WAVE_JOB_NAME = "reminders_wave"
+WAVE_MAX_ATTEMPTS = 3  # запусков этапа за процесс, если рассылка падает целиком
+
+
+def _finished_campaigns(bot_data: dict) -> Set[str]:
+    """Кампании, рассылка которых в этом процессе завершена (или исчерпала попытки)."""
+    return bot_data.setdefault("reminder_campaigns_finished", set())
+
+
+def next_fire(
+    calendar: ReminderCalendar, now: datetime, finished: AbstractSet[str] = frozenset()
+) -> Optional[Tuple[date, datetime]]:
+    """Ближайший день с этапами, которые ещё можно отправить: (день, время).
+
+    `now` - время с часовым поясом мероприятия; если время этапа уже прошло, а окно
+    дня ещё идёт, время - now. Этапы из `finished` (кампании) пропускаются.
+    """
+    window_start = parse_time(settings.REMINDER_WINDOW_START)
+    window_end = parse_time(settings.REMINDER_WINDOW_END)
+    for day, stage, event in calendar.upcoming(now.date()):
+        if reminder_campaign(stage, event) in finished:
+            continue
+        window_start_at = datetime.combine(day, window_start, now.tzinfo)
+        window_end_at = datetime.combine(day, window_end, now.tzinfo)
+        if now >= window_end_at:
+            continue
+        fire_at = window_start_at
+        stage_at = stage_starts_at(stage, event)
+        if stage_at is not None and window_start_at < stage_at < window_end_at:
+            fire_at = stage_at
+        return day, max(fire_at, now)
+    return None
+
+
+async def run_wave(context: ContextTypes.DEFAULT_TYPE) -> None:
+    day = context.job.data
+    # Этапы берутся из текущего контента: мероприятие могли изменить после планирования
+    try:
+        due = reminder_calendar(content_store.reminder_content()).due(day)
+    except ContentUnavailable as e:
+        logger.error("Рассылка напоминаний на %s пропущена: %s", day, e)
+        return
+    finished = _finished_campaigns(context.bot_data)
+    due = [(stage, event) for stage, event in due if reminder_campaign(stage, event) not in finished]
+    if not due:
+        logger.warning("На %s больше нет этапов напоминаний, рассылка пропущена", day)
+        return
+    failures: Dict[str, int] = context.bot_data.setdefault("reminder_campaign_failures", {})
+    context.bot_data["reminder_wave_running"] = True
+    try:
+        # Запросы к базе рассылка выполняет в пуле потоков, обработчики бота не ждут их
+        for stage, event in due:
+            campaign = reminder_campaign(stage, event)
+            try:
+                await send_reminder_wave(stage, event, default_senders(context.bot))
+            except Exception:
+                failures[campaign] = failures.get(campaign, 0) + 1
+                if failures[campaign] < WAVE_MAX_ATTEMPTS:
+                    logger.exception("Рассылка %s прервана, повтор при следующей проверке", campaign)
+                    continue
+                logger.exception(
+                    "Рассылка %s прервана (попыток: %s) и больше не повторяется; "
+                    "доотправить: python -m scripts.send_reminders --retry-unconfirmed",
+                    campaign, failures[campaign],
+                )
+            finished.add(campaign)
+    finally:
+        context.bot_data["reminder_wave_running"] = False
+
+
+async def check_reminders(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Планирует ближайшую рассылку; дублирующие задачи не создаются."""
+    job_queue = context.job_queue
+    # Задача run_once снимается с очереди при запуске, поэтому идущую рассылку отмечает флаг
+    if job_queue.get_jobs_by_name(WAVE_JOB_NAME) or context.bot_data.get("reminder_wave_running"):
+        return
+    try:
+        calendar = reminder_calendar(content_store.reminder_content())
+    except ContentUnavailable as e:
+        logger.error("Напоминания не планируются: %s", e)
+        return
+    now = local_now(settings.EVENT_TIMEZONE)
+    finished = _finished_campaigns(context.bot_data)
+    planned = next_fire(calendar, now, finished)
+    if planned is None:
+        return
+    day, fire_at = planned
+    # Дальние этапы запланирует одна из следующих проверок: так учитываются правки контента
+    if fire_at - now <= timedelta(seconds=settings.REMINDER_CHECK_INTERVAL):
+        stages = ", ".join(
+            f"{stage} ({event.id})" for stage, event in calendar.due(day)
+            if reminder_campaign(stage, event) not in finished
+        )
+        logger.info("Рассылка напоминаний %s запланирована на %s", stages, fire_at)
+        job_queue.run_once(run_wave, when=fire_at - now, data=day, name=WAVE_JOB_NAME)
+
+
+def schedule_reminders(application: Application) -> None:
+    if application.job_queue is None:
+        logger.warning("JobQueue недоступна (нужен python-telegram-bot[job-queue]), напоминания не планируются")
+        return
+    # first=0 APScheduler пропускает, поэтому первая проверка (догоняющая) - через секунду
+    application.job_queue.run_repeating(
+        check_reminders, interval=settings.REMINDER_CHECK_INTERVAL, first=1, name=CHECK_JOB_NAME
+    )
@@ -1,10 +1,27 @@
-from app.core.database import get_db
-from app.services.notification import NotificationService
+from app.core.config import settings
+from app.core.content import ContentUnavailable, content_store
+from app.services.reminder_calendar import reminder_calendar
+from app.utils.dates import local_now
 
 def main():
-    db = next(get_db())
-    notification_service = NotificationService(db)
-    notification_service.send_bulk_reminders()
+    """Ставит сегодняшние напоминания в outbox; отправляет их app.bot.outbox_worker."""
+    try:
+        content = content_store.reminder_content()
+    except ContentUnavailable as e:
+        raise SystemExit(f"Напоминания не поставлены в очередь: {e}")
+    # База и SQLAlchemy нужны, только если сегодня есть этап
+    if not reminder_calendar(content).due(local_now(settings.EVENT_TIMEZONE).date()):
+        print("Сегодня напоминаний нет.")
+        return
+
+    from app.core.database import init_db, session_scope
+    from app.services.notification import NotificationService
+
+    init_db()
+    with session_scope() as db:
+        notification_service = NotificationService(db)
+        count = notification_service.send_bulk_reminders()
+    print(f"Поставлено в очередь напоминаний: {count}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
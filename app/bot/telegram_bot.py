@@ -1,4 +1,6 @@
+import asyncio
 import logging
+from functools import lru_cache
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     Application,
@@ -6,165 +8,77 @@ from telegram.ext import (
     MessageHandler,
     CallbackQueryHandler,
     ContextTypes,
+    TypeHandler,
     filters,
 )
 from app.core.config import settings
-from app.core.database import get_db, init_db
-from app.services.registration import RegistrationService
+from app.core.content import content_store
+from app.core.database import init_db
+from app.core.logs import setup_logging
+from app.core.metrics import timed_handler
+from app.bot.flood_control import UpdateGuard
+from app.bot.menu import BUTTONS, MENU_ITEMS, handle_command
+from app.bot.scheduler import schedule_reminders
+from app.services.senders import close_senders
 from app.utils.constants import Platform
 
-# Enable logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
 logger = logging.getLogger(__name__)
 
-# Initialize database
-init_db()
-
-# Определим данные для кнопок и соответствующие тексты ответов
-# Можно перенести в settings или constants, но для примера оставим здесь
-BUTTONS = {
-    "info": "Информация о форуме",
-    "faq": "Часто задаваемые вопросы",
-    "contact": "Связь и помощь",
-    "register_site": "Как зарегистрироваться на сайте",
-    "reminders_on": "Получать напоминания", # Кнопка для включения напоминаний
-    "reminders_off": "Отключить напоминания", # Кнопка для отключения напоминаний
-}
-
-# Тексты ответов (можно также вынести)
-RESPONSES = {
-    "info": settings.Messages.EVENT_INFO.format(
-        date=settings.EVENT_DATE,
-        location=settings.EVENT_LOCATION,
-        link=settings.EVENT_LINK
-    ),
-    "faq": """
-Часто задаваемые вопросы:
-
-• Что такое ESG?
-ESG (Environmental, Social, Governance) - это подход к оценке деятельности компаний, учитывающий экологические, социальные и управленческие факторы.
-
-• Когда и где пройдет форум?
-Форум пройдет {} в {}.
-
-• Как зарегистрироваться на сайте?
-Инструкция по регистрации: [ссылка на инструкцию/сайт]
-
-• Сколько стоит участие?
-Участие в форуме бесплатное, но требуется предварительная регистрация на сайте.
-
-• Как связаться с организаторами?
-Вы можете связаться с организаторами через:
-Telegram: {}
-Email: {}
-Телефон: {}
-""".format(
-        settings.EVENT_DATE,
-        settings.EVENT_LOCATION,
-        settings.ADMIN_TELEGRAM,
-        settings.ADMIN_EMAIL,
-        settings.ADMIN_PHONE
-    ),
-    "contact": settings.Messages.SUPPORT_MESSAGE.format(
-        telegram=settings.ADMIN_TELEGRAM,
-        email=settings.ADMIN_EMAIL,
-        phone=settings.ADMIN_PHONE
-    ),
-    "register_site": """
-Для регистрации на форум, пожалуйста, перейдите на сайт:
-{}
-
-Следуйте инструкциям на сайте для завершения регистрации.
-""".format(settings.EVENT_LINK),
-    "reminders_on_success": "Вы подписались на напоминания о форуме. Я пришлю уведомления за неделю, 3 дня и за день до начала.",
-    "reminders_off_success": "Вы отписались от напоминаний о форуме.",
-    "welcome": """
-Добро пожаловать в бот ESG TECH Forum!
-
-Форум состоится {} в {}.
-
-Я здесь, чтобы предоставить вам информацию о форуме и помочь с регистрацией на нашем сайте.
-
-Выберите один из пунктов меню ниже или воспользуйтесь командами /info, /faq, /contact.
-""".format(settings.EVENT_DATE, settings.EVENT_LOCATION)
-}
 
-
-async def send_main_menu(update: Update, user, message_text: str) -> None:
-    """Отправляет сообщение с главным меню."""
-    keyboard = [
-        [InlineKeyboardButton(BUTTONS["info"], callback_data="info")],
-        [InlineKeyboardButton(BUTTONS["faq"], callback_data="faq")],
-        [InlineKeyboardButton(BUTTONS["contact"], callback_data="contact")],
-        [InlineKeyboardButton(BUTTONS["register_site"], callback_data="register_site")],
-    ]
+@lru_cache(maxsize=2)
+def main_menu_markup(receive_reminders: bool) -> InlineKeyboardMarkup:
+    """Клавиатура главного меню; объекты PTB неизменяемы, поэтому их можно переиспользовать."""
+    keyboard = [[InlineKeyboardButton(BUTTONS[item], callback_data=item)] for item in MENU_ITEMS]
 
     # Добавляем кнопку управления напоминаниями в зависимости от статуса пользователя
-    if user and user.receive_reminders:
+    if receive_reminders:
         keyboard.append([InlineKeyboardButton(BUTTONS["reminders_off"], callback_data="reminders_off")])
     else:
         keyboard.append([InlineKeyboardButton(BUTTONS["reminders_on"], callback_data="reminders_on")])
 
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    return InlineKeyboardMarkup(keyboard)
+
+
+async def send_main_menu(update: Update, user, message_text: str) -> None:
+    """Отправляет сообщение с главным меню."""
+    reply_markup = main_menu_markup(bool(user and user.receive_reminders))
 
     # Проверяем, есть ли у update.message метод reply_text (для команды /start)
     if hasattr(update, 'message') and update.message:
          await update.message.reply_text(message_text, reply_markup=reply_markup)
     # Если нет (для callbackQuery), используем edit_message_text
     elif hasattr(update, 'callback_query') and update.callback_query:
+         # Telegram отклоняет редактирование без изменений ("message is not modified"),
+         # поэтому такой запрос не отправляем. Telegram обрезает пробелы по краям текста
+         message = update.callback_query.message
+         if message and message.text == message_text.strip() and message.reply_markup == reply_markup:
+             return
          await update.callback_query.edit_message_text(message_text, reply_markup=reply_markup)
 
 
+@timed_handler("start")
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /start command. Greets user and shows main menu."""
-    db = next(get_db())
-    registration_service = RegistrationService(db)
-
-    # Get or create user in DB
-    user = registration_service.create_user(Platform.TELEGRAM, str(update.effective_user.id))
+    reply = await handle_command(Platform.TELEGRAM, str(update.effective_user.id), "start")
 
-    # Передаем объект пользователя в send_main_menu
-    await send_main_menu(update, user, RESPONSES["welcome"])
+    # Передаем состояние пользователя в send_main_menu
+    await send_main_menu(update, reply.user, reply.text)
 
+@timed_handler("handle_button_click")
 async def handle_button_click(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle inline button clicks."""
     query = update.callback_query
-    await query.answer() # Отвечаем на callbackQuery, чтобы кнопка не висела
-
-    db = next(get_db())
-    registration_service = RegistrationService(db)
-    user = registration_service.get_user(Platform.TELEGRAM, str(update.effective_user.id))
-
-    # Получаем данные из кнопки
-    button_data = query.data
-
-    message_text_to_edit = "" # Сообщение для редактирования
-
-    # Обрабатываем нажатия кнопок информации
-    if button_data in ["info", "faq", "contact", "register_site"]:
-        message_text_to_edit = RESPONSES.get(button_data, "Неизвестная информация.")
-
-    # Обрабатываем нажатия кнопок управления напоминаниями
-    elif button_data == "reminders_on":
-        if user:
-            user.receive_reminders = True
-            db.commit()
-            message_text_to_edit = RESPONSES["reminders_on_success"]
-    elif button_data == "reminders_off":
-        if user:
-            user.receive_reminders = False
-            db.commit()
-            message_text_to_edit = RESPONSES["reminders_off_success"]
-    else:
-        message_text_to_edit = "Неизвестная команда."
+    # Отвечаем на callbackQuery, чтобы кнопка не висела; отложенное UpdateGuard
+    # нажатие уже подтверждено им
+    guard = context.bot_data.get("update_guard")
+    if guard is None or not guard.was_answered(query.id):
+        await query.answer()
+
+    # Данные кнопки совпадают с командами меню
+    reply = await handle_command(Platform.TELEGRAM, str(update.effective_user.id), query.data)
 
     # Обновляем сообщение, сохраняя текущую разметку клавиатуры
-    # Важно получить актуального пользователя для правильного отображения кнопки напоминаний
-    updated_user = registration_service.get_user(Platform.TELEGRAM, str(update.effective_user.id))
-    await send_main_menu(update, updated_user, message_text_to_edit)
+    await send_main_menu(update, reply.user, reply.text)
 
 
 # Нам больше не нужны отдельные обработчики для faq и event_info, так как их обрабатывает handle_button_click.
@@ -191,38 +105,63 @@ async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 # Команда для включения напоминаний (альтернатива кнопке или в дополнение к ней)
 async def register_for_reminders_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    db = next(get_db())
-    registration_service = RegistrationService(db)
-    user = registration_service.get_user(Platform.TELEGRAM, str(update.effective_user.id))
-    if user:
-        user.receive_reminders = True
-        db.commit()
-        await update.message.reply_text(RESPONSES["reminders_on_success"])
-    else:
-        # Если пользователя нет (что маловероятно после /start), создадим его
-        registration_service.create_user(Platform.TELEGRAM, str(update.effective_user.id))
-        user = registration_service.get_user(Platform.TELEGRAM, str(update.effective_user.id))
-        if user:
-             user.receive_reminders = True
-             db.commit()
-             await update.message.reply_text(RESPONSES["reminders_on_success"])
+    reply = await handle_command(Platform.TELEGRAM, str(update.effective_user.id), "reminders_on")
+    await update.message.reply_text(reply.text)
 
 
 # Команда для отключения напоминаний
 async def unregister_for_reminders_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    db = next(get_db())
-    registration_service = RegistrationService(db)
-    user = registration_service.get_user(Platform.TELEGRAM, str(update.effective_user.id))
-    if user:
-        user.receive_reminders = False
-        db.commit()
-        await update.message.reply_text(RESPONSES["reminders_off_success"])
-
-
-def main() -> None:
-    """Start the bot."""
-    # Create the Application
-    application = Application.builder().token(settings.TELEGRAM_BOT_TOKEN).build()
+    reply = await handle_command(Platform.TELEGRAM, str(update.effective_user.id), "reminders_off")
+    await update.message.reply_text(reply.text)
+
+
+async def start_background_tasks(application: Application) -> None:
+    """Фоновые задачи процесса бота: слежение за файлом контента и планировщик напоминаний."""
+    application.bot_data["content_watcher"] = asyncio.create_task(
+        content_store.watch(settings.CONTENT_RELOAD_INTERVAL)
+    )
+    if not settings.REMINDER_SCHEDULER_ENABLED:
+        return
+    # Без Updater приложение работает в воркере uvicorn (app.bot.webhook); у каждого
+    # воркера были бы свой планировщик и свои лимиты частоты - N рассылок с N-кратной скоростью
+    if application.updater is None and settings.WEBHOOK_WORKERS > 1:
+        logger.warning(
+            "REMINDER_SCHEDULER_ENABLED игнорируется при WEBHOOK_WORKERS=%s: запускайте "
+            "scripts.send_reminders по cron или планировщик в отдельном процессе бота",
+            settings.WEBHOOK_WORKERS,
+        )
+        return
+    schedule_reminders(application)
+
+
+async def stop_background_tasks(application: Application) -> None:
+    watcher = application.bot_data.pop("content_watcher", None)
+    if watcher is not None:
+        watcher.cancel()
+    await close_senders()
+
+
+def build_application(webhook: bool = False) -> Application:
+    """Application factory: prepares the database and registers all handlers.
+
+    Importing this module has no side effects; everything happens here.
+    webhook - build without the polling Updater, updates are fed via process_update.
+    In webhook mode the database is not migrated here: every uvicorn worker builds its
+    own application, so app.bot.webhook.main() runs init_db() once before starting them.
+    """
+    if not webhook:
+        init_db()
+    builder = Application.builder().token(settings.TELEGRAM_BOT_TOKEN).base_url(settings.TELEGRAM_API_BASE_URL)
+    if webhook:
+        builder = builder.updater(None)
+    # В режиме webhook эти хуки вызывает lifespan FastAPI (см. app.bot.webhook)
+    builder = builder.post_init(start_background_tasks).post_shutdown(stop_background_tasks)
+    application = builder.build()
+
+    # Отсев повторов и частых нажатий до основных обработчиков
+    guard = UpdateGuard.from_settings()
+    application.bot_data["update_guard"] = guard
+    application.add_handler(TypeHandler(Update, guard), group=-1)
 
     # Добавляем обработчик команды /start
     application.add_handler(CommandHandler('start', start))
@@ -237,9 +176,16 @@ def main() -> None:
     # Добавляем обработчик любых текстовых сообщений, которые не являются командами (опционально)
     # application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text_message))
 
+    return application
+
+
+def main() -> None:
+    """Start the bot in long polling mode (for webhook mode see app.bot.webhook)."""
+    setup_logging()
+    application = build_application()
 
     # Start the Bot
     application.run_polling()
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""Приём обновлений Telegram через webhook (FastAPI + uvicorn) вместо long polling.
+Здесь же обслуживается webhook Twilio для WhatsApp (app.bot.whatsapp).
+
+Запуск: python -m app.bot.webhook (регистрирует webhook и поднимает uvicorn
+с settings.WEBHOOK_WORKERS процессами). Каждый процесс создаёт своё Application.
+"""
+import asyncio
+import hmac
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse
+from telegram import Update
+from telegram.ext import Application
+
+from app.bot.whatsapp import router as whatsapp_router
+from app.core.config import settings
+from app.core.logs import setup_logging
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+def create_app(application: Optional[Application] = None) -> FastAPI:
+    """Фабрика ASGI-приложения (uvicorn --factory).
+
+    application можно передать готовым, например с подменённым транспортом Bot API
+    для локального стенда scripts/replay_updates.py. Базу (init_db) фабрика не
+    мигрирует - это делает main() до запуска воркеров.
+    """
+    if application is None:
+        # Воркеры uvicorn - отдельные процессы, логирование настраивается в каждом
+        setup_logging()
+        from app.bot.telegram_bot import build_application
+        application = build_application(webhook=True)
+
+    if not settings.TELEGRAM_WEBHOOK_SECRET:
+        logger.warning("TELEGRAM_WEBHOOK_SECRET не задан: запросы к webhook не проверяются")
+    if not settings.TWILIO_AUTH_TOKEN:
+        logger.warning("TWILIO_AUTH_TOKEN не задан: подпись запросов к %s не проверяется", settings.WHATSAPP_WEBHOOK_PATH)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await application.initialize()
+        # post_init/post_shutdown вызываются PTB только в run_polling/run_webhook
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        yield
+        await application.stop()
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.application = application
+    app.include_router(whatsapp_router)
+
+    @app.post(settings.TELEGRAM_WEBHOOK_PATH)
+    async def telegram_webhook(
+        request: Request,
+        x_telegram_bot_api_secret_token: Optional[str] = Header(None),
+    ) -> Response:
+        secret = settings.TELEGRAM_WEBHOOK_SECRET
+        if secret and not hmac.compare_digest(x_telegram_bot_api_secret_token or "", secret):
+            raise HTTPException(status_code=403, detail="invalid secret token")
+
+        update = Update.de_json(await request.json(), application.bot)
+        # Обрабатываем прямо в запросе: конкурентность обеспечивает ASGI-сервер,
+        # а Telegram получает ответ, когда обработчик завершился
+        await application.process_update(update)
+        return Response(status_code=200)
+
+    if registry.enabled:
+        @app.get(settings.METRICS_PATH)
+        async def metrics() -> Response:
+            return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    return app
+
+
+async def set_webhook() -> None:
+    """Регистрирует URL webhook и секретный токен в Telegram."""
+    from telegram import Bot
+
+    url = settings.TELEGRAM_WEBHOOK_URL.rstrip("/") + settings.TELEGRAM_WEBHOOK_PATH
+    async with Bot(settings.TELEGRAM_BOT_TOKEN, base_url=settings.TELEGRAM_API_BASE_URL) as bot:
+        await bot.set_webhook(
+            url=url,
+            secret_token=settings.TELEGRAM_WEBHOOK_SECRET or None,
+            allowed_updates=Update.ALL_TYPES,
+        )
+    logger.info("Webhook установлен: %s", url)
+
+
+def main() -> None:
+    import uvicorn
+
+    setup_logging()
+    # Миграции (DDL) и регистрация webhook выполняются один раз в родительском процессе,
+    # а не в каждом воркере: иначе воркеры одновременно меняют схему одной базы
+    from app.core.database import init_db
+    init_db()
+    if settings.TELEGRAM_WEBHOOK_URL:
+        asyncio.run(set_webhook())
+    uvicorn.run(
+        "app.bot.webhook:create_app",
+        factory=True,
+        host=settings.WEBHOOK_HOST,
+        port=settings.WEBHOOK_PORT,
+        workers=settings.WEBHOOK_WORKERS,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Входящие сообщения WhatsApp через webhook Twilio.
+
+Меню то же, что и в Telegram (app.bot.menu), но вместо инлайн-кнопок
+пользователь отвечает номером пункта. Ответ возвращается прямо в TwiML,
+без отдельного исходящего вызова REST API.
+
+У включения и отключения напоминаний разные номера: в меню показан один из
+них, и номер выполняет именно показанное действие, а не переключает флаг по
+закэшированному (возможно устаревшему) состоянию.
+"""
+import logging
+from typing import Optional
+from xml.sax.saxutils import escape
+
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+
+from app.bot.menu import BUTTONS, MENU_ITEMS, MenuReply, handle_command
+from app.core.config import settings
+from app.utils.constants import Platform
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Команды, которые можно ввести текстом вместо номера пункта
+TEXT_COMMANDS = {
+    "start": "start",
+    "/start": "start",
+    "меню": "start",
+    "menu": "start",
+}
+
+
+# Номер пункта -> команда; из двух пунктов напоминаний в меню показывается один
+NUMBERED_COMMANDS = dict(enumerate(MENU_ITEMS + ["reminders_on", "reminders_off"], start=1))
+
+
+def menu_items(reply: MenuReply) -> list:
+    """Показываемые пункты меню: (номер, команда)."""
+    hidden = "reminders_on" if reply.user and reply.user.receive_reminders else "reminders_off"
+    return [(number, command) for number, command in NUMBERED_COMMANDS.items() if command != hidden]
+
+
+def parse_command(body: str) -> str:
+    """Преобразует текст сообщения в команду меню. Неизвестный текст показывает приветствие."""
+    text = body.strip().lower()
+    if text.isdigit() and int(text) in NUMBERED_COMMANDS:
+        return NUMBERED_COMMANDS[int(text)]
+    return TEXT_COMMANDS.get(text, "start")
+
+
+def render_reply(reply: MenuReply) -> str:
+    """Текст ответа с нумерованным меню."""
+    lines = [reply.text.strip(), ""]
+    for number, command in menu_items(reply):
+        lines.append(f"{number} - {BUTTONS[command]}")
+    lines.append("")
+    lines.append("Отправьте номер пункта меню.")
+    return "\n".join(lines)
+
+
+def twiml_message(text: str) -> str:
+    return f'<?xml version="1.0" encoding="UTF-8"?><Response><Message>{escape(text)}</Message></Response>'
+
+
+async def handle_whatsapp_message(platform_user_id: str, body: str) -> str:
+    reply = await handle_command(Platform.WHATSAPP, platform_user_id, parse_command(body))
+    return render_reply(reply)
+
+
+def _validate_signature(request: Request, params: dict, signature: Optional[str]) -> bool:
+    from twilio.request_validator import RequestValidator
+
+    # За прокси URL запроса может отличаться от того, что видит Twilio
+    url = settings.TWILIO_WEBHOOK_URL or str(request.url)
+    return RequestValidator(settings.TWILIO_AUTH_TOKEN).validate(url, params, signature or "")
+
+
+@router.post(settings.WHATSAPP_WEBHOOK_PATH)
+async def whatsapp_webhook(request: Request, x_twilio_signature: Optional[str] = Header(None)) -> Response:
+    form = await request.form()
+    params = dict(form)
+    if settings.TWILIO_AUTH_TOKEN and not _validate_signature(request, params, x_twilio_signature):
+        raise HTTPException(status_code=403, detail="invalid Twilio signature")
+
+    # Twilio присылает номер в формате "whatsapp:+номер"; храним без префикса,
+    # как его ожидает send_whatsapp_message
+    sender = params.get("From", "").removeprefix("whatsapp:")
+    if not sender:
+        raise HTTPException(status_code=400, detail="missing From")
+
+    text = await handle_whatsapp_message(sender, params.get("Body", ""))
+    return Response(content=twiml_message(text), media_type="application/xml")
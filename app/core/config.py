@@ -3,17 +3,85 @@ from typing import Optional
 import os
 from dotenv import load_dotenv
 
+
 load_dotenv()
 
+# Корень проекта: относительные пути из настроек считаются от него, а не от рабочего каталога
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 class Settings(BaseSettings):
     # Bot Settings
     TELEGRAM_BOT_TOKEN: str = os.getenv("TELEGRAM_BOT_TOKEN", "")
+    # Bot API endpoint; the token is appended to it (local fakes: benchmarks/fake_servers.py)
+    TELEGRAM_API_BASE_URL: str = os.getenv("TELEGRAM_API_BASE_URL", "https://api.telegram.org/bot")
     TWILIO_ACCOUNT_SID: str = os.getenv("TWILIO_ACCOUNT_SID", "")
     TWILIO_AUTH_TOKEN: str = os.getenv("TWILIO_AUTH_TOKEN", "")
     TWILIO_PHONE_NUMBER: str = os.getenv("TWILIO_PHONE_NUMBER", "")
-    
+    # Comma-separated sender numbers; reminder shards use them round-robin (empty - TWILIO_PHONE_NUMBER)
+    TWILIO_PHONE_NUMBERS: str = os.getenv("TWILIO_PHONE_NUMBERS", "")
+    TWILIO_API_BASE_URL: str = os.getenv("TWILIO_API_BASE_URL", "https://api.twilio.com")
+    TWILIO_CONCURRENCY: int = int(os.getenv("TWILIO_CONCURRENCY", 20))  # max open connections
+    TWILIO_TIMEOUT: float = float(os.getenv("TWILIO_TIMEOUT", 10))  # seconds per request
+
+    # Bulk sending (rate limits are messages per second)
+    TELEGRAM_GLOBAL_RATE: float = float(os.getenv("TELEGRAM_GLOBAL_RATE", 30))
+    TELEGRAM_PER_CHAT_RATE: float = float(os.getenv("TELEGRAM_PER_CHAT_RATE", 1))
+    TWILIO_RATE: float = float(os.getenv("TWILIO_RATE", 80))
+    DISPATCH_CONCURRENCY: int = int(os.getenv("DISPATCH_CONCURRENCY", 50))
+    DISPATCH_MAX_RETRIES: int = int(os.getenv("DISPATCH_MAX_RETRIES", 5))
+    REMINDER_CHUNK_SIZE: int = int(os.getenv("REMINDER_CHUNK_SIZE", 1000))
+    REMINDER_FLUSH_SIZE: int = int(os.getenv("REMINDER_FLUSH_SIZE", 500))
+    REMINDER_FLUSH_INTERVAL_MS: int = int(os.getenv("REMINDER_FLUSH_INTERVAL_MS", 1000))
+
+    # Built-in reminder scheduler (app/bot/scheduler.py); enable in one bot process only
+    # (ignored with WEBHOOK_WORKERS > 1: every worker would send its own wave)
+    REMINDER_SCHEDULER_ENABLED: bool = os.getenv("REMINDER_SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+    REMINDER_WINDOW_START: str = os.getenv("REMINDER_WINDOW_START", "10:00")
+    REMINDER_WINDOW_END: str = os.getenv("REMINDER_WINDOW_END", "20:00")
+    REMINDER_CHECK_INTERVAL: int = int(os.getenv("REMINDER_CHECK_INTERVAL", 300))
+
+    # Update guard (app/bot/flood_control.py)
+    FLOOD_MIN_INTERVAL: float = float(os.getenv("FLOOD_MIN_INTERVAL", 0.5))  # seconds between updates per user, 0 - off
+    UPDATE_DEDUP_SIZE: int = int(os.getenv("UPDATE_DEDUP_SIZE", 10000))  # remembered update_ids
+
+    # Outbox worker
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", 500))
+    OUTBOX_POLL_INTERVAL: float = float(os.getenv("OUTBOX_POLL_INTERVAL", 2))
+    OUTBOX_LEASE_SECONDS: int = int(os.getenv("OUTBOX_LEASE_SECONDS", 300))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+    OUTBOX_RETRY_BASE_DELAY: float = float(os.getenv("OUTBOX_RETRY_BASE_DELAY", 30))
+    # Workers running in parallel; each takes 1/OUTBOX_WORKERS of the rate limits above
+    OUTBOX_WORKERS: int = int(os.getenv("OUTBOX_WORKERS", 1))
+
+    # Webhook mode (app.bot.webhook)
+    TELEGRAM_WEBHOOK_URL: str = os.getenv("TELEGRAM_WEBHOOK_URL", "")  # public base URL, e.g. https://bot.example.com
+    TELEGRAM_WEBHOOK_PATH: str = os.getenv("TELEGRAM_WEBHOOK_PATH", "/telegram/webhook")
+    TELEGRAM_WEBHOOK_SECRET: str = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
+    WEBHOOK_HOST: str = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", 8000))
+    WEBHOOK_WORKERS: int = int(os.getenv("WEBHOOK_WORKERS", 1))
+    WHATSAPP_WEBHOOK_PATH: str = os.getenv("WHATSAPP_WEBHOOK_PATH", "/whatsapp/webhook")
+    # Full public URL configured in Twilio; needed for signature checks behind a proxy
+    TWILIO_WEBHOOK_URL: str = os.getenv("TWILIO_WEBHOOK_URL", "")
+
+    # Metrics (app/core/metrics.py), exported by the webhook app at METRICS_PATH
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+    METRICS_PATH: str = os.getenv("METRICS_PATH", "/metrics")
+
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./esg_bot.db")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    # SQLite: WAL lets readers work while the reminder job writes
+    SQLITE_WAL: bool = os.getenv("SQLITE_WAL", "true").lower() in ("1", "true", "yes")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
+    # User state cache (menu rendering)
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", 100000))
+    USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", 300))
     
     # Admin Contact
     ADMIN_TELEGRAM: str = os.getenv("ADMIN_TELEGRAM", "@LEXARKHOVA")
@@ -21,10 +89,20 @@ class Settings(BaseSettings):
     ADMIN_PHONE: str = os.getenv("ADMIN_PHONE", "+79998221277")
     
     # Event Information
-    EVENT_DATE: str = "17 июня 2025"
+    EVENT_DATE: str = os.getenv("EVENT_DATE", "17 июня 2025")  # "17 июня 2025", "17 June 2025" или ISO
+    # Время начала: этапы напоминаний уходят в это же время за N дней, если оно внутри окна отправки
+    EVENT_START_TIME: str = os.getenv("EVENT_START_TIME", "10:00")
+    # Часовой пояс мероприятия: в нём считаются "сегодня" и окно отправки напоминаний
+    EVENT_TIMEZONE: str = os.getenv("EVENT_TIMEZONE", "Europe/Moscow")
     EVENT_LOCATION: str = "Москва, Точка кипения – Коммуна, 2-й Донской проезд, д. 9, стр. 3"
     EVENT_LINK: str = "https://leader-id.ru/events/553947"
     EVENT_WEBSITE: str = "https://esgtechforum.ru/"
+    # Hot-reloadable event content (see app/core/content.py); EVENT_* above are the fallback
+    # only when CONTENT_FILE is not set and content.json does not exist ("" - always EVENT_*).
+    # Relative paths are resolved against PROJECT_ROOT
+    CONTENT_FILE: str = os.getenv("CONTENT_FILE", "content.json")
+    CONTENT_FILE_REQUIRED: bool = bool(os.getenv("CONTENT_FILE"))
+    CONTENT_RELOAD_INTERVAL: float = float(os.getenv("CONTENT_RELOAD_INTERVAL", 5))
     
     # Registration States
     class RegistrationState:
@@ -105,4 +183,9 @@ Email: {email}
     EMAIL_HOST_PASSWORD: str = os.getenv("EMAIL_HOST_PASSWORD", "")
     EMAIL_FROM: str = os.getenv("EMAIL_FROM", "")
 
+    @property
+    def twilio_sender_numbers(self) -> list:
+        numbers = [number.strip() for number in self.TWILIO_PHONE_NUMBERS.split(",") if number.strip()]
+        return numbers or [self.TWILIO_PHONE_NUMBER]
+
 settings = Settings() 
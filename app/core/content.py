@@ -0,0 +1,184 @@
+"""Контент мероприятий (даты, место, программа) с перезагрузкой без рестарта бота.
+
+Источник - JSON-файл settings.CONTENT_FILE (пример: content.example.json), путь
+относительно корня проекта. Если CONTENT_FILE не задан и content.json нет (или
+CONTENT_FILE пуст), используется одно мероприятие из настроек EVENT_*.
+Файл, который не удалось загрузить, не подменяется мероприятием из EVENT_*
+для рассылки: id кампаний зависят от id мероприятия, и запасное мероприятие
+получило бы уже отправленные этапы заново (см. ContentStore.reminder_content).
+ContentStore.watch() следит за изменением файла и атомарно подменяет
+текущий Content: обработчики и задача напоминаний всегда читают
+content_store.current и видят либо старую, либо новую версию целиком.
+"""
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+from app.core.config import PROJECT_ROOT, settings
+from app.utils.dates import event_datetime, local_now, parse_event_date
+
+logger = logging.getLogger(__name__)
+
+
+class ContentUnavailable(RuntimeError):
+    """Файл контента настроен, но не загружен: рассылать напоминания нельзя."""
+
+
+@dataclass(frozen=True)
+class Event:
+    id: str
+    date: str  # Дата для показа пользователю, например "17 июня 2025"
+    location: str
+    link: str
+    title: str = "ESG TECH Forum"
+    website: str = ""
+    program: str = ""  # Шаблон описания с {date}, {location}, {link}; пусто - settings.Messages.EVENT_INFO
+
+    @property
+    def info_template(self) -> str:
+        return self.program or settings.Messages.EVENT_INFO
+
+    def parsed_date(self) -> Optional[date]:
+        try:
+            return parse_event_date(self.date)
+        except ValueError:
+            return None
+
+    def starts_at(self) -> Optional[datetime]:
+        """Начало мероприятия в часовом поясе settings.EVENT_TIMEZONE."""
+        try:
+            return event_datetime(self.date, settings.EVENT_START_TIME, settings.EVENT_TIMEZONE)
+        except ValueError:
+            return None
+
+
+@dataclass(frozen=True)
+class Content:
+    events: Tuple[Event, ...]
+    version: str = ""
+    _dated: Tuple[Tuple[date, Event], ...] = field(default=(), init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        parsed = ((event.parsed_date(), event) for event in self.events)
+        dated = sorted(((day, event) for day, event in parsed if day is not None), key=lambda item: item[0])
+        object.__setattr__(self, "_dated", tuple(dated))
+
+    @property
+    def dated_events(self) -> Tuple[Tuple[date, Event], ...]:
+        """Мероприятия с разобранной датой, по возрастанию даты."""
+        return self._dated
+
+    def current_event(self, today: Optional[date] = None) -> Event:
+        """Ближайшее предстоящее мероприятие (или последнее прошедшее)."""
+        today = today or local_now(settings.EVENT_TIMEZONE).date()
+        for event_date, event in self._dated:
+            if event_date >= today:
+                return event
+        if self._dated:
+            return self._dated[-1][1]
+        return self.events[0]
+
+
+def default_event_id() -> str:
+    """id мероприятия из EVENT_*: по дате, чтобы не менялся между запусками и источниками."""
+    try:
+        return f"event-{parse_event_date(settings.EVENT_DATE).isoformat()}"
+    except ValueError:
+        return "default"
+
+
+def default_content() -> Content:
+    return Content(events=(Event(
+        id=default_event_id(),
+        date=settings.EVENT_DATE,
+        location=settings.EVENT_LOCATION,
+        link=settings.EVENT_LINK,
+        website=settings.EVENT_WEBSITE,
+    ),), version="settings")
+
+
+def load_content(path: str) -> Content:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    events = tuple(Event(**event) for event in data["events"])
+    if not events:
+        raise ValueError("content file has no events")
+    for event in events:
+        if event.parsed_date() is None:
+            logger.warning("Дата мероприятия %s не разобрана: %r, напоминаний по нему не будет", event.id, event.date)
+    return Content(events=events, version=str(os.stat(path).st_mtime_ns))
+
+
+class ContentStore:
+    def __init__(self, path: str, required: bool = False):
+        """path - файл контента ("" - только EVENT_*); required - отсутствие файла считается ошибкой."""
+        self.path = os.path.join(PROJECT_ROOT, path) if path else ""
+        self.required = required
+        self.error: Optional[str] = None
+        self._loaded = False
+        self._signature = ()  # не совпадает ни с одной подписью, в том числе None (файла нет)
+        self._content = default_content()
+        self.reload_if_changed()
+
+    @property
+    def current(self) -> Content:
+        return self._content
+
+    def reminder_content(self) -> Content:
+        """Контент для рассылки напоминаний; ContentUnavailable, если файл не загружен.
+
+        Обработчики продолжают показывать текущий контент, а рассылка останавливается:
+        по запасному мероприятию с другим id этапы ушли бы всем повторно.
+        """
+        if self.error is not None:
+            raise ContentUnavailable(f"контент {self.path} не загружен: {self.error}")
+        return self._content
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload_if_changed(self) -> bool:
+        """Перечитывает файл, если он изменился. Ошибки в файле не ломают текущий контент."""
+        if not self.path:
+            return False
+        signature = self._file_signature()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        if signature is None:
+            # Файл, который требовался или уже был загружен, пропал - это ошибка, а не переход на EVENT_*
+            if self.required or self._loaded:
+                self.error = "файл не найден"
+                logger.error("Файл контента %s не найден, рассылка напоминаний остановлена", self.path)
+                return False
+            self._content = default_content()
+            return True
+        try:
+            content = load_content(self.path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.error = str(e)
+            logger.error("Не удалось загрузить контент из %s, рассылка напоминаний остановлена: %s", self.path, e)
+            return False
+        # Подмена одной ссылкой атомарна для читателей
+        self._content = content
+        self.error = None
+        self._loaded = True
+        logger.info("Контент загружен из %s: мероприятий %s", self.path, len(content.events))
+        return True
+
+    async def watch(self, interval: float) -> None:
+        """Проверяет файл каждые `interval` секунд до отмены задачи."""
+        while True:
+            await asyncio.sleep(interval)
+            self.reload_if_changed()
+
+
+content_store = ContentStore(settings.CONTENT_FILE, settings.CONTENT_FILE_REQUIRED)
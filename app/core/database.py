@@ -1,18 +1,106 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import asyncio
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, TypeVar
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from .config import settings
+from .metrics import instrument_engine
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+T = TypeVar("T")
 
-def get_db():
+is_sqlite = settings.DATABASE_URL.startswith("sqlite")
+# INSERT ... RETURNING (create_user, ReminderService._take) и DROP COLUMN (миграции)
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+
+def _engine_kwargs() -> dict:
+    if is_sqlite:
+        # SQLite по умолчанию запрещает использовать соединение из другого потока,
+        # а запросы из обработчиков бота выполняются в пуле потоков (см. run_in_session)
+        kwargs = {"connect_args": {"check_same_thread": False}}
+        if ":memory:" in settings.DATABASE_URL or settings.DATABASE_URL == "sqlite://":
+            return kwargs
+    else:
+        kwargs = {"pool_recycle": settings.DB_POOL_RECYCLE}
+    kwargs.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    return kwargs
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_kwargs())
+# expire_on_commit=False: объекты, возвращённые из run_in_session, используются
+# после закрытия сессии, и перечитывать их после commit не нужно
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+instrument_engine(engine)
+
+
+if is_sqlite:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        if settings.SQLITE_WAL:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """Сессия на одну единицу работы: откат при ошибке, закрытие в любом случае.
+
+    Используйте вместо next(get_db()), который оставляет сессию открытой
+    до сборки мусора и держит соединение из пула.
+    """
     db = SessionLocal()
     try:
         yield db
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
 
+def get_db():
+    with session_scope() as db:
+        yield db
+
+async def run_in_session(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Выполняет fn(db, *args, **kwargs) в пуле потоков с отдельной сессией.
+
+    Позволяет вызывать синхронный SQLAlchemy из асинхронных обработчиков,
+    не блокируя event loop. Сессия закрывается после вызова, поэтому
+    возвращаемые объекты ORM отсоединены от неё.
+    """
+    def call() -> T:
+        with session_scope() as db:
+            return fn(db, *args, **kwargs)
+
+    return await asyncio.to_thread(call)
+
+def dialect_insert(db: Session, model):
+    """INSERT с поддержкой ON CONFLICT для диалекта сессии (SQLite или PostgreSQL)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
 def init_db():
+    if is_sqlite and sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        raise RuntimeError(
+            f"Нужен SQLite {'.'.join(map(str, MIN_SQLITE_VERSION))} или новее, "
+            f"Python собран с SQLite {sqlite3.sqlite_version}"
+        )
     from app.models.user import Base
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    import app.models.outbox  # noqa: F401 - регистрирует таблицу outbox в Base.metadata
+    import app.models.delivery  # noqa: F401 - и таблицу deliveries
+    from app.core.migrations import run_migrations
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
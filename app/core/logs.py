@@ -0,0 +1,13 @@
+import logging
+
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """Формат логов точек входа (бот, webhook, воркеры, скрипты).
+
+    Вызывается из main(), а не при импорте модулей, чтобы импорт не менял
+    конфигурацию логирования вызывающего кода.
+    """
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=level
+    )
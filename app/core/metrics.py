@@ -0,0 +1,196 @@
+"""Метрики процесса в формате Prometheus (text exposition 0.0.4) без внешних зависимостей.
+
+Включаются настройкой METRICS_ENABLED. В выключенном состоянии обработчики не
+оборачиваются, события SQLAlchemy не подписываются, а inc()/observe() сразу
+возвращаются, так что накладные расходы - один вызов функции.
+
+Метрики живут в памяти процесса: при нескольких воркерах uvicorn каждый
+отдаёт на /metrics свои значения (Prometheus различает их по instance/pod).
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Dict, List, Sequence, Tuple
+
+from app.core.config import settings
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()  # События SQLAlchemy приходят из пула потоков
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        if not registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [счётчики по корзинам (последняя - +Inf), сумма]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not registry.enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        lines = []
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry(settings.METRICS_ENABLED)
+
+HANDLER_LATENCY = registry.register(Histogram(
+    "bot_handler_duration_seconds", "Время обработки обновления Telegram", ["handler"],
+))
+HANDLER_ERRORS = registry.register(Counter(
+    "bot_handler_errors_total", "Исключения в обработчиках Telegram", ["handler"],
+))
+UPDATES_SHED = registry.register(Counter(
+    "bot_updates_shed_total", "Обновления, отброшенные UpdateGuard (duplicate, throttled)", ["reason"],
+))
+DB_QUERY_DURATION = registry.register(Histogram(
+    "db_query_duration_seconds", "Время выполнения SQL-запросов (count - число запросов)", ["operation"],
+))
+MESSAGES_SENT = registry.register(Counter(
+    "messages_sent_total", "Результаты отправки сообщений", ["platform", "result"],
+))
+MESSAGE_RETRIES = registry.register(Counter(
+    "message_send_retries_total", "Повторы отправки после 429/RetryAfter", ["platform"],
+))
+
+
+def timed_handler(name: str):
+    """Декоратор асинхронного обработчика: гистограмма времени и счётчик ошибок."""
+
+    def decorator(handler):
+        if not registry.enabled:
+            return handler
+
+        @wraps(handler)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await handler(*args, **kwargs)
+            except Exception:
+                HANDLER_ERRORS.inc(name)
+                raise
+            finally:
+                HANDLER_LATENCY.observe(time.perf_counter() - started, name)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_engine(engine) -> None:
+    """Подписывает гистограмму запросов на события движка SQLAlchemy."""
+    if not registry.enabled:
+        return
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_QUERY_DURATION.observe(time.perf_counter() - started, operation)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # after_cursor_execute не вызывается для упавшего запроса
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
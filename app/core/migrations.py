@@ -0,0 +1,156 @@
+"""Лёгкие идемпотентные миграции для уже существующих баз.
+
+Base.metadata.create_all создаёт только отсутствующие таблицы и не трогает
+существующие, поэтому новые колонки, индексы и их изменения для старых баз выполняются здесь.
+Все шаги можно безопасно выполнять при каждом запуске.
+"""
+import logging
+from datetime import datetime
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+# Флаги этапов в users до появления таблицы deliveries
+LEGACY_REMINDER_FLAGS = {
+    "week": "reminder_sent_week",
+    "3days": "reminder_sent_3days",
+    "1day": "reminder_sent_1day",
+}
+LEGACY_REMINDER_INDEXES = ("ix_users_reminder_week", "ix_users_reminder_3days", "ix_users_reminder_1day")
+
+# Самая ранняя запись (platform, platform_user_id) для users.id из {ref}
+_SURVIVOR_SQL = (
+    "(SELECT MIN(s.id) FROM users s JOIN users d "
+    "ON s.platform = d.platform AND s.platform_user_id = d.platform_user_id WHERE d.id = {ref})"
+)
+
+
+def _dedupe_users(conn: Connection) -> None:
+    """Удаляет дубликаты (platform, platform_user_id), оставляя самую раннюю запись.
+
+    Дубликаты могли появиться из-за гонки check-then-insert в старом create_user
+    и не дают создать уникальный индекс. Выполняется, только пока индекса нет.
+    """
+    inspector = inspect(conn)
+    index_names = {index["name"] for index in inspector.get_indexes("users")}
+    if "uq_users_platform_user" in index_names:
+        return
+    if conn.execute(text(
+        "SELECT 1 FROM users GROUP BY platform, platform_user_id HAVING COUNT(*) > 1 LIMIT 1"
+    )).first() is None:
+        return
+    duplicate = "user_id NOT IN (SELECT MIN(id) FROM users GROUP BY platform, platform_user_id)"
+    tables = set(inspector.get_table_names())
+    # foreign_keys в SQLite выключены, ON DELETE CASCADE не сработает: переносим
+    # доставки и сообщения outbox на оставшуюся запись до удаления дубликатов
+    if "deliveries" in tables:
+        # Из доставок одной кампании оставляем одну: sent, иначе самую раннюю
+        conn.execute(text(
+            "DELETE FROM deliveries WHERE EXISTS (SELECT 1 FROM deliveries e "
+            "WHERE e.campaign = deliveries.campaign AND e.id <> deliveries.id "
+            f"AND {_SURVIVOR_SQL.format(ref='e.user_id')} = {_SURVIVOR_SQL.format(ref='deliveries.user_id')} "
+            "AND ((e.status = 'sent') > (deliveries.status = 'sent') "
+            "OR ((e.status = 'sent') = (deliveries.status = 'sent') AND e.id < deliveries.id)))"
+        ))
+        conn.execute(text(
+            f"UPDATE deliveries SET user_id = {_SURVIVOR_SQL.format(ref='deliveries.user_id')} WHERE {duplicate}"
+        ))
+    if "outbox" in tables and "user_id" in {column["name"] for column in inspector.get_columns("outbox")}:
+        conn.execute(text(
+            f"UPDATE outbox SET user_id = {_SURVIVOR_SQL.format(ref='outbox.user_id')} WHERE {duplicate}"
+        ))
+    result = conn.execute(text(
+        "DELETE FROM users WHERE id NOT IN ("
+        "SELECT MIN(id) FROM users GROUP BY platform, platform_user_id)"
+    ))
+    if result.rowcount:
+        logger.warning("Удалено дубликатов пользователей: %s", result.rowcount)
+
+
+def _backfill_deliveries(conn: Connection) -> None:
+    """Переносит флаги users.reminder_sent_* в таблицу deliveries и удаляет эти колонки.
+
+    Флаги не сбрасывались между мероприятиями, то есть означали "этап уже получен",
+    поэтому переносятся как кампании текущего мероприятия: True - sent,
+    NULL (отправка была прервана) - claimed. Выполняется, пока колонки существуют;
+    если файл контента не загружен, перенос откладывается до следующего запуска.
+    """
+    columns = {column["name"] for column in inspect(conn).get_columns("users")}
+    legacy = {stage: flag for stage, flag in LEGACY_REMINDER_FLAGS.items() if flag in columns}
+    if legacy:
+        from app.core.content import ContentUnavailable, content_store
+        from app.services.reminder_calendar import reminder_campaign
+
+        try:
+            event = content_store.reminder_content().current_event()
+        except ContentUnavailable as e:
+            logger.warning("Перенос флагов reminder_sent_* в deliveries отложен: %s", e)
+            return
+        now = datetime.utcnow()
+        for stage, flag in legacy.items():
+            result = conn.execute(
+                text(
+                    "INSERT INTO deliveries (user_id, campaign, status, attempts, created_at, updated_at) "
+                    f"SELECT id, :campaign, CASE WHEN {flag} IS NULL THEN 'claimed' ELSE 'sent' END, 1, :now, :now "
+                    f"FROM users WHERE {flag} IS NOT FALSE "
+                    "ON CONFLICT (campaign, user_id) DO NOTHING"
+                ),
+                {"campaign": reminder_campaign(stage, event), "now": now},
+            )
+            logger.info("Перенесено в deliveries (%s): %s", reminder_campaign(stage, event), result.rowcount)
+
+    drop = [column for column in (*LEGACY_REMINDER_FLAGS.values(), "reminder_sent") if column in columns]
+    if not drop:
+        return
+    for index in LEGACY_REMINDER_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+    for column in drop:
+        conn.execute(text(f"ALTER TABLE users DROP COLUMN {column}"))
+
+
+def _add_missing_columns(conn: Connection) -> None:
+    """ALTER TABLE ... ADD COLUMN для колонок модели, которых нет в существующей таблице.
+
+    Поддерживаются только колонки без NOT NULL (например users.unreachable_at):
+    у старых строк в них будет NULL.
+    """
+    from app.models.user import Base
+
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                raise RuntimeError(f"Колонку {table.name}.{column.name} NOT NULL нужно добавить вручную")
+            conn.execute(text(
+                f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+            ))
+            logger.info("Добавлена колонка %s.%s", table.name, column.name)
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    from app.models.user import Base
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+MIGRATIONS = [
+    _dedupe_users,
+    _backfill_deliveries,
+    _add_missing_columns,
+    _create_missing_indexes,
+]
+
+
+def run_migrations(engine: Engine) -> None:
+    with engine.begin() as conn:
+        for migration in MIGRATIONS:
+            migration(conn)
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+from app.models.user import Base
+from app.utils.constants import DeliveryStatus
+
+class Delivery(Base):
+    """Журнал доставок: одна строка на пару (кампания, пользователь).
+
+    Кампания - произвольная строка (для напоминаний см. reminder_campaign), поэтому
+    новая рассылка не требует новых колонок в users. Строка создаётся, когда
+    пользователь берётся в работу, и дальше обновляется на месте: статус
+    claimed/queued -> sent/failed, неудачная строка берётся повторно с attempts + 1,
+    latency_ms и error_code относятся к последней попытке. При слиянии дубликатов
+    пользователей (_dedupe_users) строки переносятся на оставшуюся запись, а из
+    совпадающих по кампании остаётся одна.
+    """
+    __tablename__ = "deliveries"
+    __table_args__ = (
+        # Anti-join при выборке получателей и взятие в работу (ReminderService)
+        Index("uq_deliveries_campaign_user", "campaign", "user_id", unique=True),
+        # Отчёты по кампаниям (DeliveryService.campaign_stats)
+        Index("ix_deliveries_campaign_status", "campaign", "status"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    campaign = Column(String, nullable=False)
+    status = Column(String, nullable=False, default=DeliveryStatus.CLAIMED.value)
+    attempts = Column(Integer, nullable=False, default=1)
+    latency_ms = Column(Integer)  # время запроса к API мессенджера (последняя попытка)
+    error_code = Column(String)  # код ошибки Twilio или класс исключения Telegram
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Delivery {self.campaign} user={self.user_id} ({self.status})>"
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+from app.models.user import Base
+from app.utils.constants import OutboxStatus
+
+class OutboxMessage(Base):
+    """Исходящее сообщение в очереди на отправку (см. NotificationService и outbox_worker)."""
+    __tablename__ = "outbox"
+    __table_args__ = (
+        # Выборка готовых к отправке сообщений воркером
+        Index("ix_outbox_ready", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    idempotency_key = Column(String, nullable=False, unique=True)
+    platform = Column(String, nullable=False)
+    recipient = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default=OutboxStatus.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String)
+    locked_until = Column(DateTime)
+    last_error = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+    # Строка журнала deliveries, которую нужно закрыть после отправки (для рассылок кампаний)
+    campaign = Column(String)
+    user_id = Column(Integer)
+
+    def __repr__(self):
+        return f"<OutboxMessage {self.idempotency_key} ({self.status})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -6,6 +6,13 @@ Base = declarative_base()
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Поиск пользователя в обработчиках и upsert в RegistrationService.create_user
+        Index("uq_users_platform_user", "platform", "platform_user_id", unique=True),
+        # Выборка получателей напоминаний (ReminderService.iter_recipient_chunks);
+        # отправленное отмечается в таблице deliveries
+        Index("ix_users_receive_reminders", "receive_reminders", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     platform = Column(String, nullable=False)  # 'telegram' or 'whatsapp'
@@ -15,12 +22,12 @@ class User(Base):
     phone = Column(String, nullable=False)
     registration_date = Column(DateTime, default=datetime.utcnow)
     is_registered = Column(Boolean, default=False)
-    reminder_sent = Column(Boolean, default=False)
     feedback_submitted = Column(Boolean, default=False)
     receive_reminders = Column(Boolean, default=False)
-    reminder_sent_week = Column(Boolean, default=False)
-    reminder_sent_3days = Column(Boolean, default=False)
-    reminder_sent_1day = Column(Boolean, default=False)
+    # Постоянная ошибка доставки (бот заблокирован, чат удалён, номер не в WhatsApp):
+    # рассылки пропускают пользователя, пока он снова не напишет боту
+    unreachable_at = Column(DateTime)
+    unreachable_reason = Column(String)
     
     def __repr__(self):
         return f"<User {self.full_name} ({self.platform})>" 
\ No newline at end of file
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class UserState:
+    """Минимальное состояние пользователя, нужное для отрисовки меню."""
+    id: int
+    platform: str
+    platform_user_id: str
+    receive_reminders: bool
+
+    @classmethod
+    def from_user(cls, user) -> "UserState":
+        return cls(
+            id=user.id,
+            platform=getattr(user.platform, "value", user.platform),
+            platform_user_id=user.platform_user_id,
+            receive_reminders=bool(user.receive_reminders),
+        )
+
+
+class UserStateCache:
+    """LRU-кэш состояния пользователей с TTL.
+
+    Ключ - (platform, platform_user_id). RegistrationService обновляет кэш
+    при каждой записи (write-through), TTL ограничивает расхождение с БД,
+    если пишут несколько процессов. Потокобезопасен: сервис работает в пуле потоков.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Tuple[str, str], Tuple[float, UserState]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(platform, platform_user_id: str) -> Tuple[str, str]:
+        return getattr(platform, "value", platform), platform_user_id
+
+    def get(self, platform, platform_user_id: str) -> Optional[UserState]:
+        key = self._key(platform, platform_user_id)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, state: UserState) -> None:
+        key = self._key(state.platform, state.platform_user_id)
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, state)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, platform, platform_user_id: str) -> None:
+        with self._lock:
+            self._data.pop(self._key(platform, platform_user_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+user_state_cache = UserStateCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
@@ -0,0 +1,132 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, func, select, true, update
+from sqlalchemy.orm import Session
+
+from app.models.delivery import Delivery
+from app.models.user import User
+from app.utils.constants import DeliveryStatus
+
+
+@dataclass
+class CampaignStats:
+    campaign: str
+    statuses: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    avg_latency_ms: Optional[float] = None
+    max_latency_ms: Optional[int] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @property
+    def delivered(self) -> int:
+        """Confirmed sends; queued rows are still waiting in the outbox and are not counted."""
+        return self.statuses.get(DeliveryStatus.SENT.value, 0)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return (self.finished_at - self.started_at).total_seconds()
+
+    @property
+    def rate(self) -> float:
+        """Delivered messages per second between the first claim and the last result."""
+        return self.delivered / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class DeliveryService:
+    """Per-campaign reports over the deliveries table and pruning of unreachable recipients."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _mark_unreachable(self, conditions, params: List[Dict]) -> int:
+        if not params:
+            return 0
+        # Core-таблица: список параметров у ORM-модели означал бы bulk UPDATE по первичному ключу
+        table = User.__table__
+        result = self.db.execute(
+            update(table)
+            .where(*conditions, table.c.unreachable_at.is_(None))
+            .values(unreachable_at=datetime.utcnow(), unreachable_reason=bindparam("b_reason")),
+            params,
+        )
+        self.db.commit()
+        return result.rowcount
+
+    def mark_unreachable(self, reasons: Dict[int, str]) -> int:
+        """Mark users (id -> reason) unreachable with one executemany UPDATE.
+
+        Reminder waves skip them until the user writes to the bot again
+        (RegistrationService clears the mark). Returns the number of newly marked users.
+        """
+        return self._mark_unreachable(
+            [User.__table__.c.id == bindparam("b_id")],
+            [{"b_id": user_id, "b_reason": reason[:200]} for user_id, reason in reasons.items()],
+        )
+
+    def mark_unreachable_recipients(self, recipients: List[tuple]) -> int:
+        """Same as mark_unreachable for (platform, platform_user_id, reason) tuples (outbox messages)."""
+        table = User.__table__
+        return self._mark_unreachable(
+            [table.c.platform == bindparam("b_platform"), table.c.platform_user_id == bindparam("b_recipient")],
+            [
+                {"b_platform": getattr(platform, "value", platform), "b_recipient": recipient, "b_reason": reason[:200]}
+                for platform, recipient, reason in recipients
+            ],
+        )
+
+    def unreachable_counts(self) -> Dict[str, Dict[str, int]]:
+        """Unreachable users by platform and reason."""
+        counts: Dict[str, Dict[str, int]] = {}
+        rows = self.db.execute(
+            select(User.platform, User.unreachable_reason, func.count())
+            .where(User.unreachable_at.is_not(None))
+            .group_by(User.platform, User.unreachable_reason)
+        ).all()
+        for platform, reason, count in rows:
+            counts.setdefault(platform, {})[reason or "unknown"] = count
+        return counts
+
+    def campaign_stats(self, campaign_prefix: str = "") -> List[CampaignStats]:
+        """Status counts, latency, duration and top error codes for each matching campaign."""
+        matching = Delivery.campaign.startswith(campaign_prefix) if campaign_prefix else true()
+        stats: Dict[str, CampaignStats] = {}
+        rows = self.db.execute(
+            select(
+                Delivery.campaign,
+                Delivery.status,
+                func.count(),
+                func.min(Delivery.created_at),
+                func.max(Delivery.updated_at),
+            )
+            .where(matching)
+            .group_by(Delivery.campaign, Delivery.status)
+        ).all()
+        for campaign, status, count, started_at, finished_at in rows:
+            item = stats.setdefault(campaign, CampaignStats(campaign))
+            item.statuses[status] = count
+            item.started_at = min(filter(None, (item.started_at, started_at)), default=None)
+            item.finished_at = max(filter(None, (item.finished_at, finished_at)), default=None)
+
+        latency = self.db.execute(
+            select(Delivery.campaign, func.avg(Delivery.latency_ms), func.max(Delivery.latency_ms))
+            .where(matching, Delivery.status == DeliveryStatus.SENT.value)
+            .group_by(Delivery.campaign)
+        ).all()
+        for campaign, avg_ms, max_ms in latency:
+            stats[campaign].avg_latency_ms = float(avg_ms) if avg_ms is not None else None
+            stats[campaign].max_latency_ms = max_ms
+
+        errors = self.db.execute(
+            select(Delivery.campaign, Delivery.error_code, func.count())
+            .where(matching, Delivery.status == DeliveryStatus.FAILED.value)
+            .group_by(Delivery.campaign, Delivery.error_code)
+        ).all()
+        for campaign, code, count in errors:
+            stats[campaign].errors[code or "unknown"] = count
+
+        return sorted(stats.values(), key=lambda item: item.started_at or datetime.min)
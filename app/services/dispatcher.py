@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, Optional, Union
+
+from app.core.config import settings
+from app.core.metrics import MESSAGE_RETRIES, MESSAGES_SENT
+from app.utils.constants import Platform
+
+logger = logging.getLogger(__name__)
+
+Sender = Callable[[str, str], Awaitable[Any]]
+# Колбэк может вернуть awaitable (например, сброс результатов в базу), тогда его дожидается воркер
+ResultCallback = Callable[["OutgoingMessage", bool], Optional[Awaitable[None]]]
+
+
+class TokenBucket:
+    """Асинхронный token bucket: не более `rate` операций в секунду."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float) -> None:
+        """Останавливает выдачу токенов (например, после RetryAfter)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class KeyedRateLimiter:
+    """Ограничение частоты для каждого ключа отдельно (например, для каждого чата)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next_allowed: "OrderedDict[str, float]" = OrderedDict()
+
+    def _prune(self, now: float) -> None:
+        # Ключи упорядочены по времени, поэтому устаревшие всегда в начале
+        while self._next_allowed:
+            key, allowed_at = next(iter(self._next_allowed.items()))
+            if allowed_at > now:
+                break
+            del self._next_allowed[key]
+
+    async def acquire(self, key: str) -> None:
+        now = time.monotonic()
+        self._prune(now)
+        allowed_at = self._next_allowed.pop(key, now)
+        self._next_allowed[key] = max(allowed_at, now) + self.interval
+        if allowed_at > now:
+            await asyncio.sleep(allowed_at - now)
+
+
+@dataclass
+class OutgoingMessage:
+    platform: Platform
+    recipient: str
+    text: str
+    payload: Any = None  # Данные вызывающего кода (например, пользователь и этап напоминания)
+    error: Optional[Exception] = None  # Последняя ошибка, если отправить не удалось
+    latency: Optional[float] = None  # Время последнего запроса к API мессенджера, с
+
+
+@dataclass
+class DispatchReport:
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    unreachable: int = 0  # из failed: постоянные ошибки (см. is_permanent)
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def rate(self) -> float:
+        """Достигнутая скорость отправки, сообщений в секунду."""
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Отправлено: {self.sent}, ошибок: {self.failed} (недоступны: {self.unreachable}), повторов: {self.retries}, "
+            f"время: {self.elapsed:.1f} с, скорость: {self.rate:.1f} сообщ./с"
+        )
+
+
+def retry_delay(exc: Exception, attempt: int) -> Optional[float]:
+    """Возвращает паузу перед повтором или None, если ошибку повторять не нужно.
+
+    telegram.error.RetryAfter несёт `retry_after`, TwilioRestException - HTTP `status`.
+    """
+    retry_after = getattr(exc, "retry_after", None)
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    if retry_after is not None:
+        return float(retry_after)
+    if getattr(exc, "status", None) == 429:
+        return min(2.0 ** attempt, 60.0)
+    return None
+
+
+# Ошибки, после которых повтор отправки этому получателю бессмыслен:
+# Twilio 21211 - неверный номер, 21610 - получатель отписался (STOP),
+# 21614 - номер не мобильный, 63003 - номер не зарегистрирован в WhatsApp
+PERMANENT_TWILIO_CODES = {21211, 21610, 21614, 63003}
+# Telegram: Forbidden (бот заблокирован, аккаунт удалён) - всегда,
+# BadRequest - только с этими текстами
+PERMANENT_TELEGRAM_ERRORS = ("chat not found", "user not found", "peer_id_invalid", "user is deactivated")
+
+
+def is_permanent(exc: Exception) -> bool:
+    """Постоянная ли ошибка доставки (получатель недоступен), в отличие от временной (сеть, 429, 5xx).
+
+    Классы telegram.error сравниваются по имени, чтобы диспетчер не импортировал PTB.
+    """
+    if getattr(exc, "code", None) in PERMANENT_TWILIO_CODES:
+        return True
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    if "Forbidden" in names:
+        return True
+    if "BadRequest" in names:
+        message = str(exc).lower()
+        return any(text in message for text in PERMANENT_TELEGRAM_ERRORS)
+    return False
+
+
+def error_code(exc: Exception) -> str:
+    """Короткий код ошибки для журнала доставок: код Twilio или класс исключения Telegram."""
+    code = getattr(exc, "code", None)
+    return str(code) if code is not None else type(exc).__name__
+
+
+def failure_reason(exc: Exception) -> str:
+    """Код и текст ошибки для users.unreachable_reason."""
+    code, text = error_code(exc), str(exc)
+    return text if text.startswith(code) or f"code {code}" in text else f"{code}: {text}"
+
+
+def default_limits(telegram_share: float = 1.0, whatsapp_share: float = 1.0) -> Dict[Platform, TokenBucket]:
+    """Лимиты процесса; share - доля общего лимита, если его делят несколько процессов."""
+    return {
+        Platform.TELEGRAM: TokenBucket(settings.TELEGRAM_GLOBAL_RATE * telegram_share),
+        Platform.WHATSAPP: TokenBucket(settings.TWILIO_RATE * whatsapp_share),
+    }
+
+
+class BulkDispatcher:
+    """Рассылка сообщений с ограниченным параллелизмом и лимитами частоты по каналам."""
+
+    def __init__(
+        self,
+        senders: Dict[Platform, Sender],
+        limits: Optional[Dict[Platform, TokenBucket]] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ):
+        self.senders = senders
+        self.limits = limits if limits is not None else default_limits()
+        self.per_chat = {Platform.TELEGRAM: KeyedRateLimiter(settings.TELEGRAM_PER_CHAT_RATE)}
+        self.concurrency = concurrency or settings.DISPATCH_CONCURRENCY
+        self.max_retries = max_retries if max_retries is not None else settings.DISPATCH_MAX_RETRIES
+
+    async def _send(self, message: OutgoingMessage, report: DispatchReport) -> bool:
+        sender = self.senders.get(message.platform)
+        if sender is None:
+            logger.warning("Нет отправителя для платформы %s", message.platform)
+            message.error = ValueError(f"unsupported platform: {message.platform}")
+            MESSAGES_SENT.inc(getattr(message.platform, "value", message.platform), "failure")
+            return False
+
+        bucket = self.limits.get(message.platform)
+        chat_limiter = self.per_chat.get(message.platform)
+        platform = getattr(message.platform, "value", message.platform)
+        for attempt in range(self.max_retries + 1):
+            if chat_limiter is not None:
+                await chat_limiter.acquire(message.recipient)
+            if bucket is not None:
+                await bucket.acquire()
+            started = time.perf_counter()
+            try:
+                await sender(message.recipient, message.text)
+                message.latency = time.perf_counter() - started
+                MESSAGES_SENT.inc(platform, "success")
+                return True
+            except Exception as e:
+                message.latency = time.perf_counter() - started
+                message.error = e
+                delay = None if is_permanent(e) else retry_delay(e, attempt)
+                if delay is None or attempt == self.max_retries:
+                    logger.warning(
+                        "Ошибка при отправке сообщения %s пользователю %s: %s",
+                        message.platform, message.recipient, e,
+                    )
+                    MESSAGES_SENT.inc(platform, "failure")
+                    return False
+                report.retries += 1
+                MESSAGE_RETRIES.inc(platform)
+                if bucket is not None:
+                    bucket.pause(delay)
+                else:
+                    await asyncio.sleep(delay)
+        return False
+
+    async def dispatch(
+        self,
+        messages: Union[Iterable[OutgoingMessage], AsyncIterable[OutgoingMessage]],
+        on_result: Optional[ResultCallback] = None,
+        report: Optional[DispatchReport] = None,
+    ) -> DispatchReport:
+        """Отправляет все сообщения и возвращает отчёт со скоростью рассылки.
+
+        Переданный report заполняется по ходу отправки, его можно читать извне.
+        messages может быть асинхронным итератором (например, с подгрузкой получателей
+        из базы в пуле потоков); воркеры берут из него сообщения по очереди.
+        """
+        report = report if report is not None else DispatchReport()
+        if isinstance(messages, AsyncIterable):
+            source = aiter(messages)
+            lock = asyncio.Lock()
+
+            async def next_message() -> Optional[OutgoingMessage]:
+                # Асинхронный генератор нельзя продвигать из нескольких задач одновременно
+                async with lock:
+                    return await anext(source, None)
+        else:
+            queue = iter(messages)
+
+            async def next_message() -> Optional[OutgoingMessage]:
+                return next(queue, None)
+
+        async def worker() -> None:
+            while (message := await next_message()) is not None:
+                ok = await self._send(message, report)
+                if ok:
+                    report.sent += 1
+                else:
+                    report.failed += 1
+                    if message.error is not None and is_permanent(message.error):
+                        report.unreachable += 1
+                if on_result is not None:
+                    pending = on_result(message, ok)
+                    if pending is not None:
+                        await pending
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        report.finished_at = time.monotonic()
+        return report
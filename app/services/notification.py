@@ -0,0 +1,187 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import and_, exists, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.content import Event, content_store
+from app.core.database import dialect_insert
+from app.models.delivery import Delivery
+from app.models.outbox import OutboxMessage
+from app.services.reminder_calendar import reminder_calendar, reminder_campaign
+from app.services.reminders import ReminderService, reminder_text
+from app.utils.constants import DeliveryStatus, OutboxStatus, Platform
+from app.utils.dates import local_now
+
+logger = logging.getLogger(__name__)
+
+
+def outbox_key(campaign: str, user_id: int, attempt: int) -> str:
+    """idempotency_key сообщения кампании; у первой попытки - без номера, как раньше."""
+    return f"{campaign}:{user_id}" if attempt <= 1 else f"{campaign}:{user_id}:{attempt}"
+
+
+class NotificationService:
+    """Очередь исходящих сообщений (таблица outbox).
+
+    Сообщения только ставятся в очередь; отправляет их outbox_worker,
+    которых можно запустить несколько. Доставка at-least-once: если воркер
+    упал после отправки, но до отметки, сообщение уйдёт повторно после
+    истечения аренды. Повторная постановка с тем же idempotency_key игнорируется.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue(self, platform: Platform, recipient: str, body: str, idempotency_key: str) -> None:
+        """Put a message into the outbox. Duplicate idempotency keys are ignored."""
+        self.enqueue_many([(platform, recipient, body, idempotency_key)])
+
+    def enqueue_many(self, messages: Iterable[tuple]) -> None:
+        """Bulk variant of enqueue for (platform, recipient, body, idempotency_key) tuples.
+
+        A tuple may carry (campaign, user_id) as two extra items: the deliveries row
+        of that pair is then settled when the outbox sends or dead-letters the message.
+        """
+        now = datetime.utcnow()
+        rows = []
+        for platform, recipient, body, key, *delivery in messages:
+            campaign, user_id = delivery or (None, None)
+            rows.append({
+                "platform": getattr(platform, "value", platform),
+                "recipient": recipient,
+                "body": body,
+                "idempotency_key": key,
+                "status": OutboxStatus.PENDING.value,
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+                "campaign": campaign,
+                "user_id": user_id,
+            })
+        if rows:
+            stmt = dialect_insert(self.db, OutboxMessage).on_conflict_do_nothing(
+                index_elements=[OutboxMessage.idempotency_key]
+            )
+            self.db.execute(stmt, rows)
+            self.db.commit()
+
+    def send_bulk_reminders(self, today: Optional[datetime] = None) -> int:
+        """Enqueue today's reminder stages for all subscribers who have not received them."""
+        today = (today or local_now(settings.EVENT_TIMEZONE)).date()
+        total = 0
+        # В один день могут выпасть этапы нескольких мероприятий
+        for stage, event in reminder_calendar(content_store.reminder_content()).due(today):
+            total += self._enqueue_stage(stage, event)
+        return total
+
+    def _enqueue_stage(self, stage: str, event: Event) -> int:
+        reminder_service = ReminderService(self.db)
+        text = reminder_text(stage, event)
+        campaign = reminder_campaign(stage, event)
+        total = 0
+        for chunk in reminder_service.iter_recipient_chunks(campaign, settings.REMINDER_CHUNK_SIZE):
+            # Сначала отметка в deliveries: получателей, которых уже взяла параллельная
+            # прямая рассылка (send_reminder_wave), она не вернёт, и в outbox они не попадут.
+            # Отметка и строки outbox фиксируются одним commit в enqueue_many
+            queued = reminder_service.mark_queued(campaign, [row.id for row in chunk], commit=False)
+            # Номер попытки в ключе: повторная постановка после неудачи не схлопнется
+            # со старым сообщением (в том числе dead) по idempotency_key
+            self.enqueue_many(
+                (
+                    row.platform, row.platform_user_id, text,
+                    outbox_key(campaign, row.id, queued[row.id]), campaign, row.id,
+                )
+                for row in chunk
+                if row.id in queued
+            )
+            total += len(queued)
+        logger.info("Поставлено в очередь напоминаний %s: %s", campaign, total)
+        return total
+
+    def _ready_condition(self, now: datetime):
+        return or_(
+            and_(OutboxMessage.status == OutboxStatus.PENDING.value, OutboxMessage.next_attempt_at <= now),
+            # Аренда воркера, который упал, истекла
+            and_(OutboxMessage.status == OutboxStatus.SENDING.value, OutboxMessage.locked_until < now),
+        )
+
+    def claim_batch(self, worker_id: str, limit: int, lease: timedelta) -> List[OutboxMessage]:
+        """Lease up to `limit` ready messages to `worker_id`.
+
+        The UPDATE re-checks readiness, so concurrent workers never lease the same row.
+        """
+        now = datetime.utcnow()
+        ids = self.db.scalars(
+            select(OutboxMessage.id)
+            .where(self._ready_condition(now))
+            .order_by(OutboxMessage.next_attempt_at, OutboxMessage.id)
+            .limit(limit)
+        ).all()
+        if not ids:
+            return []
+        self.db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(ids), self._ready_condition(now))
+            .values(
+                status=OutboxStatus.SENDING.value,
+                locked_by=worker_id,
+                locked_until=now + lease,
+                attempts=OutboxMessage.attempts + 1,
+            )
+        )
+        self.db.commit()
+        return self.db.scalars(
+            select(OutboxMessage).where(
+                OutboxMessage.id.in_(ids),
+                OutboxMessage.locked_by == worker_id,
+                OutboxMessage.status == OutboxStatus.SENDING.value,
+            )
+        ).all()
+
+    def _settle_deliveries(self, message_ids: List[int], status: DeliveryStatus, error_code: Optional[str] = None) -> None:
+        """Closes queued deliveries rows of campaign messages that the outbox has finished with."""
+        self.db.execute(
+            update(Delivery)
+            .where(
+                Delivery.status == DeliveryStatus.QUEUED.value,
+                exists().where(
+                    OutboxMessage.id.in_(message_ids),
+                    OutboxMessage.campaign == Delivery.campaign,
+                    OutboxMessage.user_id == Delivery.user_id,
+                ),
+            )
+            .values(status=status.value, error_code=error_code, updated_at=datetime.utcnow())
+        )
+
+    def mark_sent(self, message_ids: List[int]) -> None:
+        if message_ids:
+            self.db.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id.in_(message_ids))
+                .values(status=OutboxStatus.SENT.value, sent_at=datetime.utcnow(), locked_by=None, locked_until=None)
+            )
+            self._settle_deliveries(message_ids, DeliveryStatus.SENT)
+        self.db.commit()
+
+    def mark_failed(
+        self, message: OutboxMessage, error: str, permanent: bool = False, error_code: Optional[str] = None,
+    ) -> None:
+        """Schedule a retry with exponential backoff, or dead-letter after the last attempt.
+
+        Permanent errors (recipient unreachable) are dead-lettered at once.
+        """
+        values = {"last_error": error[:500], "locked_by": None, "locked_until": None}
+        if permanent or message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            values["status"] = OutboxStatus.DEAD.value
+            logger.warning("Сообщение %s перемещено в dead letter: %s", message.idempotency_key, error)
+            # Пара кампании возвращается в очередь рассылки (failed) со своим кодом ошибки
+            self._settle_deliveries([message.id], DeliveryStatus.FAILED, error_code or "outbox_dead")
+        else:
+            delay = min(settings.OUTBOX_RETRY_BASE_DELAY * 2 ** (message.attempts - 1), 3600)
+            values["status"] = OutboxStatus.PENDING.value
+            values["next_attempt_at"] = datetime.utcnow() + timedelta(seconds=delay)
+        self.db.execute(update(OutboxMessage).where(OutboxMessage.id == message.id).values(values))
+        self.db.commit()
@@ -4,25 +4,35 @@ from app.models.user import User
 from app.utils.constants import Platform
 # from typing import Tuple, Optional # Удаляем Optional, так как get_user может остаться
 from typing import Optional
+from app.core.database import dialect_insert, run_in_session
+from app.services.cache import UserState, user_state_cache
 
 class RegistrationService:
     def __init__(self, db: Session):
         self.db = db
 
     def create_user(self, platform: Platform, platform_user_id: str) -> User:
-        """Create a new user in the database if not exists."""
-        user = self.get_user(platform, platform_user_id)
+        """Create a new user in the database if not exists.
+
+        INSERT ... ON CONFLICT DO NOTHING RETURNING, safe under concurrent /start; an existing
+        user is read back and only updated when it was marked unreachable.
+        """
+        stmt = dialect_insert(self.db, User).values(
+            platform=platform,
+            platform_user_id=platform_user_id,
+            full_name="", # Оставляем пустые, так как регистрация через бота убрана
+            email="",
+            phone=""
+        )
+        stmt = stmt.on_conflict_do_nothing(index_elements=[User.platform, User.platform_user_id]).returning(User)
+        user = self.db.scalars(stmt).one_or_none()
         if user is None:
-            user = User(
-                platform=platform,
-                platform_user_id=platform_user_id,
-                full_name="", # Оставляем пустые, так как регистрация через бота убрана
-                email="",
-                phone=""
-            )
-            self.db.add(user)
-            self.db.commit()
-            self.db.refresh(user)
+            user = self.get_user(platform, platform_user_id)
+            # Пользователь, который пишет боту, снова достижим
+            if user.unreachable_at is not None:
+                user.unreachable_at = user.unreachable_reason = None
+        self.db.commit()
+        user_state_cache.put(UserState.from_user(user))
         return user
 
     def get_user(self, platform: Platform, platform_user_id: str) -> Optional[User]:
@@ -32,6 +42,32 @@ class RegistrationService:
             User.platform_user_id == platform_user_id
         ).first()
 
+    def get_user_state(self, platform: Platform, platform_user_id: str) -> Optional[UserState]:
+        """Get user state from cache, falling back to the database."""
+        state = user_state_cache.get(platform, platform_user_id)
+        if state is None:
+            state = self._load_user_state(platform, platform_user_id)
+        return state
+
+    def _load_user_state(self, platform: Platform, platform_user_id: str) -> Optional[UserState]:
+        user = self.get_user(platform, platform_user_id)
+        if user is None:
+            return None
+        state = UserState.from_user(user)
+        user_state_cache.put(state)
+        return state
+
+    def set_receive_reminders(self, platform: Platform, platform_user_id: str, enabled: bool) -> Optional[User]:
+        """Enable or disable reminders for user. Returns updated user or None if not found."""
+        user = self.get_user(platform, platform_user_id)
+        if user is not None:
+            user.receive_reminders = enabled
+            if enabled:
+                user.unreachable_at = user.unreachable_reason = None
+            self.db.commit()
+            user_state_cache.put(UserState.from_user(user))
+        return user
+
     # Удаляем все методы, связанные с обновлением данных регистрации, завершением регистрации, удалением и обратной связью.
     # def update_user_name(...): ...
     # def update_user_email(...): ...
@@ -39,4 +75,30 @@ class RegistrationService:
     # def complete_registration(...): ...
     # def is_registration_complete(...): ...
     # def delete_user(...): ...
-    # def save_feedback(...): ... 
\ No newline at end of file
+    # def save_feedback(...): ...
+
+
+class AsyncRegistrationService:
+    """Async variant of RegistrationService for bot handlers.
+
+    Each call runs the sync service in a worker thread with its own session,
+    so SQLite I/O does not block the event loop. Returned users are detached.
+    """
+
+    async def create_user(self, platform: Platform, platform_user_id: str) -> User:
+        return await run_in_session(lambda db: RegistrationService(db).create_user(platform, platform_user_id))
+
+    async def get_user(self, platform: Platform, platform_user_id: str) -> Optional[User]:
+        return await run_in_session(lambda db: RegistrationService(db).get_user(platform, platform_user_id))
+
+    async def get_user_state(self, platform: Platform, platform_user_id: str) -> Optional[UserState]:
+        # Попадание в кэш обслуживается прямо в event loop, без похода в пул потоков
+        state = user_state_cache.get(platform, platform_user_id)
+        if state is not None:
+            return state
+        return await run_in_session(lambda db: RegistrationService(db)._load_user_state(platform, platform_user_id))
+
+    async def set_receive_reminders(self, platform: Platform, platform_user_id: str, enabled: bool) -> Optional[User]:
+        return await run_in_session(
+            lambda db: RegistrationService(db).set_receive_reminders(platform, platform_user_id, enabled)
+        )
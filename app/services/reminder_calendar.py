@@ -0,0 +1,63 @@
+"""Календарь этапов напоминаний.
+
+Модуль намеренно лёгкий (без SQLAlchemy и клиентов мессенджеров): по нему
+scripts/send_reminders.py решает, есть ли сегодня рассылка, и завершается
+за миллисекунды, если её нет.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.core.content import Content, Event
+
+# Этапы напоминаний: за сколько дней до события отправляются
+REMINDER_STAGES = {
+    "week": 7,
+    "3days": 3,
+    "1day": 1,
+}
+
+
+@dataclass(frozen=True)
+class ReminderCalendar:
+    """Заранее вычисленные дни отправки этапов: день -> ((этап, мероприятие), ...).
+
+    Вопрос "нужно ли что-то отправлять сегодня" - один поиск в словаре,
+    без разбора дат и без обращения к базе. В один день могут выпасть этапы
+    нескольких мероприятий - отправляются все.
+    """
+    days: Dict[date, Tuple[Tuple[str, Event], ...]]
+
+    def due(self, today: date) -> Tuple[Tuple[str, Event], ...]:
+        return self.days.get(today, ())
+
+    def upcoming(self, today: date) -> Iterator[Tuple[date, str, Event]]:
+        """Этапы начиная с `today`, по возрастанию дня."""
+        for day in sorted(self.days):
+            if day >= today:
+                for stage, event in self.days[day]:
+                    yield day, stage, event
+
+
+@lru_cache(maxsize=4)
+def reminder_calendar(content: Content) -> ReminderCalendar:
+    """Календарь напоминаний для версии контента (пересчитывается только при её смене)."""
+    days: Dict[date, List[Tuple[str, Event]]] = {}
+    for event_date, event in content.dated_events:
+        for stage, days_before in REMINDER_STAGES.items():
+            days.setdefault(event_date - timedelta(days=days_before), []).append((stage, event))
+    return ReminderCalendar({day: tuple(entries) for day, entries in days.items()})
+
+
+def stage_starts_at(stage: str, event: Event) -> Optional[datetime]:
+    """Время этапа: начало мероприятия (EVENT_START_TIME, часовой пояс мероприятия) за N дней до него."""
+    starts_at = event.starts_at()
+    if starts_at is None:
+        return None
+    return starts_at - timedelta(days=REMINDER_STAGES[stage])
+
+
+def reminder_campaign(stage: str, event: Event) -> str:
+    """Кампания в журнале доставок (таблица deliveries) для этапа напоминаний о мероприятии."""
+    return f"reminder:{event.id}:{stage}"
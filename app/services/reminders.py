@@ -0,0 +1,349 @@
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import bindparam, exists, func, literal, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.content import Event
+from app.core.database import dialect_insert, run_in_session
+from app.models.delivery import Delivery
+from app.models.user import User
+from app.services.deliveries import DeliveryService
+from app.services.dispatcher import (
+    BulkDispatcher, DispatchReport, OutgoingMessage, Sender, default_limits, error_code, failure_reason, is_permanent,
+)
+from app.services.reminder_calendar import reminder_campaign
+from app.utils.constants import DeliveryStatus, Platform
+
+logger = logging.getLogger(__name__)
+
+
+def reminder_text(stage: str, event: Event) -> str:
+    """Текст напоминания для этапа."""
+    # Тексты напоминаний (можно вынести в настройки/константы)
+    reminder_messages = {
+        "week": f"Напоминание! До {event.title} осталась неделя! Форум состоится {event.date}. Подробности: {event.link}",
+        "3days": f"Напоминание! До {event.title} осталось 3 дня! Форум состоится {event.date}. Подробности: {event.link}",
+        "1day": f"Последнее напоминание! {event.title} завтра! {event.date} в {event.location}. Подробности: {event.link}"
+    }
+    return reminder_messages[stage]
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Часть получателей волны: пользователи с id % count == index.
+
+    Разбиение по остатку равномерно при любых пропусках в id и не требует
+    знать границы диапазонов заранее.
+    """
+    index: int = 0
+    count: int = 1
+
+    def __post_init__(self):
+        if not 0 <= self.index < self.count:
+            raise ValueError(f"shard index {self.index} is out of range for {self.count} shards")
+
+    def condition(self, column=None):
+        """Условие шарда на id пользователя (по умолчанию users.id)."""
+        column = User.id if column is None else column
+        return (column % self.count) == self.index
+
+
+class ReminderService:
+    """Получатели напоминаний и учёт доставок в таблице deliveries.
+
+    Состояние пары (кампания, пользователь) - строка Delivery: нет строки или
+    failed - ждёт отправки, claimed - взята в работу (отправка не подтверждена),
+    queued/sent - отправлена. Взятые в работу строки не выбираются повторно,
+    поэтому после падения скрипта никто не получит напоминание дважды.
+    """
+
+    def __init__(self, db: Session, shard: Optional[Shard] = None):
+        self.db = db
+        # Сервис видит только получателей своего шарда (None - всех)
+        self.shard = shard if shard is not None and shard.count > 1 else None
+
+    def _recipients(self, *conditions, column=None):
+        if self.shard is not None:
+            conditions += (self.shard.condition(column),)
+        return conditions
+
+    def recipient_chunk(self, campaign: str, after_id: int = 0, chunk_size: int = 1000) -> List[Row]:
+        """Next `chunk_size` subscribers with id > `after_id` who have not received `campaign` yet.
+
+        Already handled users are excluded with an anti-join (NOT EXISTS) on the
+        (campaign, user_id) index, unreachable users are skipped. Only
+        (id, platform, platform_user_id) are loaded.
+        """
+        handled = exists().where(
+            Delivery.campaign == campaign,
+            Delivery.user_id == User.id,
+            Delivery.status != DeliveryStatus.FAILED.value,
+        )
+        return self.db.execute(
+            select(User.id, User.platform, User.platform_user_id)
+            .where(*self._recipients(
+                User.receive_reminders == True, User.unreachable_at.is_(None), ~handled, User.id > after_id,
+            ))
+            .order_by(User.id)
+            .limit(chunk_size)
+        ).all()
+
+    def iter_recipient_chunks(self, campaign: str, chunk_size: int = 1000) -> Iterator[List[Row]]:
+        """Yield recipient_chunk() results with keyset pagination (memory does not depend on the table size)."""
+        last_id = 0
+        while True:
+            rows = self.recipient_chunk(campaign, last_id, chunk_size)
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1].id
+
+    def _take(
+        self, campaign: str, user_ids: List[int], status: DeliveryStatus, commit: bool = True,
+    ) -> Dict[int, int]:
+        """Одним INSERT ... SELECT ... ON CONFLICT переводит пользователей в `status`.
+
+        Новые пары вставляются, неудачные (failed) берутся повторно; занятые
+        другим запуском или уже отправленные не меняются и не возвращаются.
+        Возвращает id взятых пользователей -> номер попытки.
+        """
+        if not user_ids:
+            return {}
+        now = datetime.utcnow()
+        stmt = dialect_insert(self.db, Delivery).from_select(
+            ["user_id", "campaign", "status", "attempts", "created_at", "updated_at"],
+            select(User.id, literal(campaign), literal(status.value), literal(1), literal(now), literal(now))
+            .where(User.id.in_(user_ids)),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Delivery.campaign, Delivery.user_id],
+            set_={
+                "status": status.value,
+                "attempts": Delivery.attempts + 1,
+                "latency_ms": None,
+                "error_code": None,
+                "updated_at": now,
+            },
+            where=Delivery.status == DeliveryStatus.FAILED.value,
+        ).returning(Delivery.user_id, Delivery.attempts)
+        taken = dict(self.db.execute(stmt).all())
+        if commit:
+            self.db.commit()
+        return taken
+
+    def claim(self, campaign: str, user_ids: List[int]) -> Set[int]:
+        """Mark pending users as in-flight for `campaign` before sending to them.
+
+        Returns the ids actually claimed: a row already taken by a concurrent
+        run is not returned, so two runs never send to the same user.
+        """
+        return set(self._take(campaign, user_ids, DeliveryStatus.CLAIMED))
+
+    def mark_queued(self, campaign: str, user_ids: List[int], commit: bool = True) -> Dict[int, int]:
+        """Take users for delivery through the outbox; returns the ids to enqueue -> attempt number.
+
+        commit=False leaves the transaction open, so the caller can insert the
+        outbox rows in the same commit.
+        """
+        return self._take(campaign, user_ids, DeliveryStatus.QUEUED, commit)
+
+    def record_results(self, campaign: str, results: List[Dict]) -> None:
+        """Store delivery results with one executemany UPDATE.
+
+        `results` items: {"user_id", "status", "latency_ms", "error_code"};
+        failed users return to the queue.
+        """
+        if not results:
+            return
+        # Core-таблица, а не модель: ORM превратил бы список параметров в bulk UPDATE по первичному ключу
+        table = Delivery.__table__
+        self.db.execute(
+            update(table)
+            .where(table.c.campaign == campaign, table.c.user_id == bindparam("b_user_id"))
+            .values(
+                status=bindparam("b_status"),
+                latency_ms=bindparam("b_latency_ms"),
+                error_code=bindparam("b_error_code"),
+                updated_at=datetime.utcnow(),
+            ),
+            [
+                {
+                    "b_user_id": result["user_id"],
+                    "b_status": result["status"],
+                    "b_latency_ms": result["latency_ms"],
+                    "b_error_code": result["error_code"],
+                }
+                for result in results
+            ],
+        )
+        self.db.commit()
+
+    def _unconfirmed(self, campaign: str):
+        return self._recipients(
+            Delivery.campaign == campaign,
+            Delivery.status == DeliveryStatus.CLAIMED.value,
+            column=Delivery.user_id,
+        )
+
+    def count_unconfirmed(self, campaign: str) -> int:
+        """Users left in-flight by an interrupted run (delivery state unknown)."""
+        return self.db.scalar(select(func.count()).select_from(Delivery).where(*self._unconfirmed(campaign)))
+
+    def release_unconfirmed(self, campaign: str) -> int:
+        """Return in-flight users to the queue. May cause double-sends, use deliberately."""
+        result = self.db.execute(
+            update(Delivery)
+            .where(*self._unconfirmed(campaign))
+            .values(status=DeliveryStatus.FAILED.value, error_code="unconfirmed", updated_at=datetime.utcnow())
+        )
+        self.db.commit()
+        return result.rowcount
+
+
+class DeliveryRecorder:
+    """Buffers delivery results and flushes them as bulk UPDATEs.
+
+    A flush happens every `batch_size` results or `flush_interval` seconds,
+    whichever comes first, so the job commits once per batch instead of once per message.
+    Recipients that failed permanently are marked unreachable in the same flush.
+    The flush runs in a worker thread with its own session (run_in_session),
+    so the event loop of the bot is not blocked by the database.
+    """
+
+    def __init__(self, campaign: str, batch_size: int, flush_interval: float):
+        self.campaign = campaign
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._results: List[Dict] = []
+        self._unreachable: Dict[int, str] = {}
+        self._last_flush = time.monotonic()
+
+    def record(
+        self,
+        user_id: int,
+        ok: bool,
+        latency: Optional[float] = None,
+        error: Optional[str] = None,
+        unreachable_reason: Optional[str] = None,
+    ) -> Optional[Awaitable[None]]:
+        """Buffers a result; returns the flush to await when the batch is full or stale."""
+        if unreachable_reason is not None:
+            self._unreachable[user_id] = unreachable_reason
+        self._results.append({
+            "user_id": user_id,
+            "status": (DeliveryStatus.SENT if ok else DeliveryStatus.FAILED).value,
+            "latency_ms": round(latency * 1000) if latency is not None else None,
+            "error_code": error,
+        })
+        if (
+            len(self._results) >= self.batch_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            return self.flush()
+        return None
+
+    @staticmethod
+    def _save(db: Session, campaign: str, results: List[Dict], unreachable: Dict[int, str]) -> None:
+        DeliveryService(db).mark_unreachable(unreachable)
+        ReminderService(db).record_results(campaign, results)
+
+    async def flush(self) -> None:
+        # Буфер забирается до await: пока идёт запись, новые результаты копятся в новом
+        results, unreachable = self._results, self._unreachable
+        self._results, self._unreachable = [], {}
+        self._last_flush = time.monotonic()
+        if results or unreachable:
+            await run_in_session(self._save, self.campaign, results, unreachable)
+
+
+async def send_reminder_wave(
+    stage: str,
+    event: Event,
+    senders: Dict[Platform, Sender],
+    retry_unconfirmed: bool = False,
+    shard: Optional[Shard] = None,
+    limits=None,
+    report: Optional[DispatchReport] = None,
+) -> DispatchReport:
+    """Отправляет этап напоминаний всем подписчикам (шарда), которые его ещё не получили.
+
+    Запросы к базе выполняются в пуле потоков (run_in_session), поэтому рассылку
+    можно запускать прямо в event loop бота (app.bot.scheduler).
+    limits - лимиты частоты этого процесса (по умолчанию default_limits());
+    report - отчёт, который заполняется по ходу рассылки (для отображения прогресса).
+    """
+    text = reminder_text(stage, event)
+    campaign = reminder_campaign(stage, event)
+    unconfirmed = await run_in_session(lambda db: ReminderService(db, shard).count_unconfirmed(campaign))
+    if unconfirmed:
+        if retry_unconfirmed:
+            await run_in_session(lambda db: ReminderService(db, shard).release_unconfirmed(campaign))
+            logger.info("Повторная отправка %s неподтверждённых напоминаний предыдущего запуска.", unconfirmed)
+        else:
+            logger.warning(
+                "Пропущено %s напоминаний, прерванных в предыдущем запуске "
+                "(статус неизвестен; используйте --retry-unconfirmed для повторной отправки).",
+                unconfirmed,
+            )
+
+    recorder = DeliveryRecorder(
+        campaign,
+        batch_size=settings.REMINDER_FLUSH_SIZE,
+        flush_interval=settings.REMINDER_FLUSH_INTERVAL_MS / 1000,
+    )
+
+    dispatcher = BulkDispatcher(senders, limits if limits is not None else default_limits())
+
+    def load_chunk(db: Session, after_id: int) -> List[Row]:
+        return ReminderService(db, shard).recipient_chunk(campaign, after_id, settings.REMINDER_CHUNK_SIZE)
+
+    def claim(db: Session, user_ids: List[int]) -> Set[int]:
+        return ReminderService(db, shard).claim(campaign, user_ids)
+
+    async def iter_messages():
+        # Получатели подгружаются порциями по мере отправки, а не списком целиком.
+        # В работу (claimed) они берутся пачками по числу параллельных отправок прямо
+        # перед отправкой: если процесс упадёт, неподтверждёнными останутся не больше
+        # одной пачки и сообщений в полёте, а не вся порция
+        last_id = 0
+        while True:
+            rows = await run_in_session(load_chunk, last_id)
+            if not rows:
+                return
+            last_id = rows[-1].id
+            for start in range(0, len(rows), dispatcher.concurrency):
+                batch = rows[start:start + dispatcher.concurrency]
+                claimed = await run_in_session(claim, [row.id for row in batch])
+                for row in batch:
+                    if row.id in claimed:
+                        yield OutgoingMessage(
+                            platform=row.platform,
+                            recipient=row.platform_user_id,
+                            text=text,
+                            payload=row,
+                        )
+
+    def on_result(message: OutgoingMessage, ok: bool) -> Optional[Awaitable[None]]:
+        row = message.payload
+        error = unreachable = None
+        if not ok and message.error is not None:
+            error = error_code(message.error)
+            if is_permanent(message.error):
+                unreachable = failure_reason(message.error)
+        if ok:
+            logger.debug("Отправлено напоминание %s пользователю %s (%s)", stage, row.platform_user_id, row.platform)
+        return recorder.record(row.id, ok, message.latency, error, unreachable)
+
+    try:
+        report = await dispatcher.dispatch(iter_messages(), on_result, report)
+    finally:
+        await recorder.flush()
+    shard_note = f" [шард {shard.index + 1}/{shard.count}]" if shard is not None and shard.count > 1 else ""
+    logger.info("Напоминания %s%s: %s", campaign, shard_note, report.summary())
+    return report
@@ -0,0 +1,82 @@
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.services.dispatcher import Sender
+from app.utils.constants import Platform
+
+_bot = None
+_whatsapp_clients: Dict[Optional[str], object] = {}
+
+
+def get_bot():
+    """Telegram Bot, создаётся при первом обращении.
+
+    Пул HTTP-соединений рассчитан на DISPATCH_CONCURRENCY параллельных отправок
+    (по умолчанию в PTB одно соединение).
+    """
+    global _bot
+    if _bot is None:
+        from telegram import Bot
+        from telegram.request import HTTPXRequest
+        _bot = Bot(
+            token=settings.TELEGRAM_BOT_TOKEN,
+            base_url=settings.TELEGRAM_API_BASE_URL,
+            request=HTTPXRequest(connection_pool_size=settings.DISPATCH_CONCURRENCY),
+        )
+    return _bot
+
+
+def get_whatsapp_client(from_number: Optional[str] = None):
+    """Асинхронный клиент Twilio для WhatsApp, создаётся при первом обращении.
+
+    from_number - номер отправителя (по умолчанию TWILIO_PHONE_NUMBER); по клиенту на номер.
+    """
+    client = _whatsapp_clients.get(from_number)
+    if client is None:
+        from app.services.twilio_client import TwilioWhatsAppClient
+        client = _whatsapp_clients[from_number] = TwilioWhatsAppClient.from_settings(from_number)
+    return client
+
+
+async def send_telegram_message(chat_id: str, message: str):
+    """Отправляет сообщение пользователю Telegram."""
+    await get_bot().send_message(chat_id=chat_id, text=message)
+
+
+async def send_whatsapp_message(to_number: str, message: str):
+    """Отправляет сообщение пользователю WhatsApp через Twilio."""
+    return await get_whatsapp_client().send(to_number, message)
+
+
+def default_senders(bot=None, whatsapp_from: Optional[str] = None) -> Dict[Platform, Sender]:
+    """Отправители по платформам.
+
+    bot - уже работающий Bot (например, context.bot в процессе бота), чтобы
+    переиспользовать его пул соединений вместо создания второго клиента;
+    whatsapp_from - номер отправителя WhatsApp (шарды рассылки делят квоту между номерами).
+    """
+    telegram_sender = send_telegram_message
+    if bot is not None:
+        async def telegram_sender(chat_id: str, message: str):
+            await bot.send_message(chat_id=chat_id, text=message)
+
+    whatsapp_sender = send_whatsapp_message
+    if whatsapp_from is not None:
+        async def whatsapp_sender(to_number: str, message: str):
+            return await get_whatsapp_client(whatsapp_from).send(to_number, message)
+
+    return {
+        Platform.TELEGRAM: telegram_sender,
+        Platform.WHATSAPP: whatsapp_sender,
+    }
+
+
+async def close_senders() -> None:
+    """Закрывает HTTP-соединения созданных клиентов."""
+    global _bot
+    while _whatsapp_clients:
+        _, client = _whatsapp_clients.popitem()
+        await client.close()
+    if _bot is not None:
+        await _bot.shutdown()
+        _bot = None
@@ -0,0 +1,119 @@
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.models.delivery import Delivery
+from app.models.user import User
+from app.utils.constants import DeliveryStatus
+
+# Поля, которые можно загрузить из файла; идентичность - (platform, platform_user_id)
+IMPORT_FIELDS = ("full_name", "email", "phone", "is_registered", "receive_reminders")
+# NOT NULL без значения по умолчанию: для новых строк подставляется пустая строка
+REQUIRED_DEFAULTS = {"full_name": "", "email": "", "phone": ""}
+
+EXPORT_COLUMNS = (
+    "id", "platform", "platform_user_id", "full_name", "email", "phone", "registration_date",
+    "is_registered", "receive_reminders",
+)
+# Состояние доставок пользователя: {кампания: статус} из таблицы deliveries
+DELIVERIES_FIELD = "deliveries"
+EXPORT_FIELDS = EXPORT_COLUMNS + (DELIVERIES_FIELD,)
+DELIVERY_STATUSES = {status.value for status in DeliveryStatus}
+
+
+class SubscriberService:
+    """Bulk import and export of the users table."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def upsert_many(self, rows: Iterable[Dict]) -> int:
+        """Insert or update users by (platform, platform_user_id) with bulk executemany.
+
+        For existing users only the fields present in a row are overwritten, so
+        empty cells in the source file keep their values. A "deliveries" item
+        ({campaign: status}) is upserted into the deliveries table.
+        Returns the number of rows written.
+        """
+        # executemany требует одинаковый набор колонок, поэтому строки группируются по нему;
+        # внутри одного INSERT ... ON CONFLICT ключ должен встречаться один раз
+        # (PostgreSQL иначе отклоняет запрос), побеждает последняя строка
+        groups: Dict[frozenset, Dict[tuple, Dict]] = {}
+        deliveries: Dict[tuple, Dict[str, str]] = {}
+        for row in rows:
+            key = (row["platform"], row["platform_user_id"])
+            if DELIVERIES_FIELD in row:
+                row = dict(row)
+                deliveries[key] = row.pop(DELIVERIES_FIELD)
+            groups.setdefault(frozenset(row), {})[key] = row
+        written = 0
+        for fields, group in groups.items():
+            stmt = dialect_insert(self.db, User)
+            update_fields = [field for field in IMPORT_FIELDS if field in fields]
+            if update_fields:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[User.platform, User.platform_user_id],
+                    set_={field: stmt.excluded[field] for field in update_fields},
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=[User.platform, User.platform_user_id])
+            self.db.execute(stmt, [{**REQUIRED_DEFAULTS, **row} for row in group.values()])
+            written += len(group)
+        self._upsert_deliveries(deliveries)
+        self.db.commit()
+        return written
+
+    def _upsert_deliveries(self, deliveries: Dict[tuple, Dict[str, str]]) -> None:
+        """Restore {campaign: status} per (platform, platform_user_id) with one executemany upsert."""
+        if not any(deliveries.values()):
+            return
+        ids = dict(
+            ((platform, platform_user_id), user_id)
+            for user_id, platform, platform_user_id in self.db.execute(
+                select(User.id, User.platform, User.platform_user_id)
+                .where(tuple_(User.platform, User.platform_user_id).in_(list(deliveries)))
+            )
+        )
+        now = datetime.utcnow()
+        rows = [
+            {"user_id": ids[key], "campaign": campaign, "status": status, "attempts": 1,
+             "created_at": now, "updated_at": now}
+            for key, campaigns in deliveries.items()
+            if key in ids
+            for campaign, status in campaigns.items()
+        ]
+        stmt = dialect_insert(self.db, Delivery)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Delivery.campaign, Delivery.user_id],
+            set_={"status": stmt.excluded.status, "updated_at": stmt.excluded.updated_at},
+        )
+        self.db.execute(stmt, rows)
+
+    def iter_export_chunks(self, chunk_size: int = 5000, subscribed_only: bool = False) -> Iterator[List[Dict]]:
+        """Yield users ordered by id in keyset-paginated chunks (memory does not grow with the table).
+
+        Each item has EXPORT_FIELDS keys; "deliveries" is {campaign: status}
+        loaded with one query per chunk.
+        """
+        columns = [getattr(User, name) for name in EXPORT_COLUMNS]
+        last_id = 0
+        while True:
+            query = select(*columns).where(User.id > last_id)
+            if subscribed_only:
+                query = query.where(User.receive_reminders == True)
+            rows = self.db.execute(query.order_by(User.id).limit(chunk_size)).all()
+            if not rows:
+                return
+            users = [{**row._mapping, DELIVERIES_FIELD: {}} for row in rows]
+            by_id = {user["id"]: user for user in users}
+            for user_id, campaign, status in self.db.execute(
+                select(Delivery.user_id, Delivery.campaign, Delivery.status)
+                .where(Delivery.user_id.in_(list(by_id)))
+                .order_by(Delivery.user_id, Delivery.campaign)
+            ):
+                by_id[user_id][DELIVERIES_FIELD][campaign] = status
+            yield users
+            last_id = rows[-1].id
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+from app.core.config import settings
+
+
+class TwilioSendError(Exception):
+    """Ошибка Twilio REST API.
+
+    status - HTTP-статус (429 обрабатывается диспетчером как ограничение частоты),
+    code - код ошибки Twilio, retry_after - значение заголовка Retry-After, если он был.
+    """
+
+    def __init__(self, status: int, code: Optional[int], message: str, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}, code {code}: {message}")
+        self.status = status
+        self.code = code
+        if retry_after is not None:
+            self.retry_after = retry_after
+
+
+class TwilioWhatsAppClient:
+    """Асинхронная отправка WhatsApp через Twilio REST API на aiohttp.
+
+    Одна ClientSession с пулом keep-alive соединений на весь процесс:
+    запросы идут параллельно (до `concurrency` соединений) и не блокируют event loop.
+    """
+
+    def __init__(
+        self,
+        account_sid: str,
+        auth_token: str,
+        from_number: str,
+        base_url: str = "https://api.twilio.com",
+        concurrency: int = 20,
+        timeout: float = 10.0,
+    ):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self.url = f"{base_url.rstrip('/')}/2010-04-01/Accounts/{account_sid}/Messages.json"
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    def from_settings(cls, from_number: Optional[str] = None) -> "TwilioWhatsAppClient":
+        return cls(
+            settings.TWILIO_ACCOUNT_SID,
+            settings.TWILIO_AUTH_TOKEN,
+            from_number or settings.TWILIO_PHONE_NUMBER,
+            base_url=settings.TWILIO_API_BASE_URL,
+            concurrency=settings.TWILIO_CONCURRENCY,
+            timeout=settings.TWILIO_TIMEOUT,
+        )
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                auth=aiohttp.BasicAuth(self.account_sid, self.auth_token),
+            )
+        return self._session
+
+    async def send(self, to_number: str, body: str) -> str:
+        """Отправляет сообщение и возвращает SID сообщения Twilio."""
+        # Twilio требует номер в формате "whatsapp:+номер"
+        data = {"From": f"whatsapp:{self.from_number}", "To": f"whatsapp:{to_number}", "Body": body}
+        async with self._get_session().post(self.url, data=data) as response:
+            payload = await response.json(content_type=None)
+            if response.status >= 400:
+                retry_after = response.headers.get("Retry-After")
+                raise TwilioSendError(
+                    response.status,
+                    payload.get("code") if isinstance(payload, dict) else None,
+                    payload.get("message", "") if isinstance(payload, dict) else str(payload),
+                    float(retry_after) if retry_after and retry_after.isdigit() else None,
+                )
+            return payload["sid"]
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            # Дать aiohttp закрыть SSL-соединения до остановки event loop
+            await asyncio.sleep(0)
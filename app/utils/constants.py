@@ -4,6 +4,18 @@ class Platform(str, Enum):
     TELEGRAM = "telegram"
     WHATSAPP = "whatsapp"
 
+class OutboxStatus(str, Enum):
+    PENDING = "pending"  # ждёт отправки (в том числе повторной)
+    SENDING = "sending"  # взято воркером, действует аренда locked_until
+    SENT = "sent"
+    DEAD = "dead"  # исчерпаны попытки отправки
+
+class DeliveryStatus(str, Enum):
+    CLAIMED = "claimed"  # взято в работу, результат отправки не подтверждён
+    QUEUED = "queued"  # передано в outbox, доставкой занимается outbox_worker
+    SENT = "sent"
+    FAILED = "failed"  # не доставлено, будет взято в работу повторно
+
 # class RegistrationState(str, Enum): # Удаляем
 #     INITIAL = "initial"
 #     ASKING_NAME = "asking_name"
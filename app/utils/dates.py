@@ -0,0 +1,45 @@
+import re
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+# Названия месяцев без учёта локали процесса: strptime("%B") под C/en-локалью
+# не понимает "17 июня 2025". Ключи - первые три буквы (родительный и
+# именительный падеж, а также английские названия).
+_MONTHS = {
+    "янв": 1, "фев": 2, "мар": 3, "апр": 4, "мая": 5, "май": 5, "июн": 6,
+    "июл": 7, "авг": 8, "сен": 9, "окт": 10, "ноя": 11, "дек": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+_TEXT_DATE = re.compile(r"^\s*(\d{1,2})\s+([^\W\d_]+)\.?\s+(\d{4})(?:\s*г(?:ода|\.)?)?\s*$")
+
+
+def parse_event_date(value: str) -> date:
+    """Разбирает дату события: "17 июня 2025", "17 June 2025" или "2025-06-17"."""
+    match = _TEXT_DATE.match(value)
+    if match is None:
+        try:
+            return date.fromisoformat(value.strip())
+        except ValueError:
+            raise ValueError(f"unrecognized event date: {value!r}") from None
+    day, month_name, year = match.groups()
+    month = _MONTHS.get(month_name.lower()[:3])
+    if month is None:
+        raise ValueError(f"unknown month in event date: {value!r}")
+    return date(int(year), month, int(day))
+
+
+def parse_time(value: str) -> time:
+    """Время в формате "HH:MM"."""
+    return datetime.strptime(value, "%H:%M").time()
+
+
+def event_datetime(value: str, start_time: str, tz: str) -> datetime:
+    """Начало события с часовым поясом (дата из parse_event_date, время "HH:MM")."""
+    return datetime.combine(parse_event_date(value), parse_time(start_time), ZoneInfo(tz))
+
+
+def local_now(tz: str) -> datetime:
+    """Текущее время в часовом поясе события."""
+    return datetime.now(ZoneInfo(tz))
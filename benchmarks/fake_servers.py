@@ -0,0 +1,107 @@
+"""Локальные заглушки Telegram Bot API и Twilio для нагрузочных замеров.
+
+Обе отвечают с настраиваемой задержкой и долей ответов 429, как настоящие API
+при превышении лимитов: Telegram - {"parameters": {"retry_after": N}},
+Twilio - код 20429 и заголовок Retry-After (см. scripts/twilio_stub.py).
+Запуск отдельно:
+    python -m benchmarks.fake_servers --port 8098 --latency 0.03 --rate-limit-ratio 0.01
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import time
+
+from aiohttp import web
+
+from scripts.twilio_stub import create_stub_app
+
+FAKE_BOT_USER = {"id": 1, "is_bot": True, "first_name": "ESG Bot", "username": "esg_test_bot"}
+
+
+def create_fake_bot_api(latency: float = 0.0, rate_limit_ratio: float = 0.0, retry_after: int = 1) -> web.Application:
+    """aiohttp-приложение, отвечающее как https://api.telegram.org/bot{token}/{method}.
+
+    Счётчики доступны в app["stats"].
+    """
+    stats = {"accepted": 0, "rate_limited": 0}
+    message_ids = itertools.count(1)
+
+    async def call_method(request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+        if latency:
+            await asyncio.sleep(latency)
+        if method != "getMe" and rate_limit_ratio and random.random() < rate_limit_ratio:
+            stats["rate_limited"] += 1
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            }, status=429)
+        stats["accepted"] += 1
+        if method == "getMe":
+            result = FAKE_BOT_USER
+        elif method in ("sendMessage", "editMessageText"):
+            chat_id = int(params.get("chat_id") or 1)
+            result = {
+                "message_id": next(message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text", ""),
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_post("/bot{token}/{method}", call_method)
+    return app
+
+
+def create_fake_backends(latency: float = 0.0, rate_limit_ratio: float = 0.0) -> web.Application:
+    """Bot API и Twilio на одном порту: TELEGRAM_API_BASE_URL=<url>/bot, TWILIO_API_BASE_URL=<url>."""
+    app = create_fake_bot_api(latency, rate_limit_ratio)
+    twilio = create_stub_app(latency, rate_limit_ratio)
+    app["twilio_stats"] = twilio["stats"]
+    app.router.add_routes([
+        web.post(route.resource.canonical, route.handler)
+        for route in twilio.router.routes()
+        if route.method == "POST"
+    ])
+    return app
+
+
+async def start_fake_backends(
+    latency: float = 0.0, rate_limit_ratio: float = 0.0, host: str = "127.0.0.1", port: int = 0,
+):
+    """Запускает заглушки в текущем event loop. Возвращает (runner, base_url, app)."""
+    app = create_fake_backends(latency, rate_limit_ratio)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}", app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Заглушки Telegram Bot API и Twilio")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    args = parser.parse_args()
+    web.run_app(
+        create_fake_backends(args.latency, args.rate_limit_ratio),
+        host=args.host, port=args.port, access_log=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Сценарии замеров. Выполняются в отдельном процессе, запускаемом benchmarks.run:
+настройки (DATABASE_URL, TELEGRAM_API_BASE_URL, ...) читаются при импорте app,
+поэтому каждая конфигурация базы получает свой процесс.
+
+Результат печатается последней строкой stdout в виде JSON.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, List
+
+from app.core.database import engine, session_scope
+from benchmarks.seed import FIRST_USER_ID, reset_schema, seed_users
+
+
+def _seed(users: int) -> float:
+    with session_scope() as db:
+        reset_schema(db)
+        return seed_users(db, users)
+
+
+async def bench_handlers(args) -> Dict:
+    """/start и кнопки меню через webhook и настоящие обработчики, Bot API - заглушка."""
+    from scripts.replay_updates import replay, synthetic_updates
+
+    active = min(args.active_users, args.users) or 1
+    updates = list(synthetic_updates(args.updates, users=active, first_user_id=FIRST_USER_ID))
+    return await replay(updates, args.concurrency)
+
+
+async def bench_reminders(args) -> Dict:
+    """Волна напоминаний через scripts.send_reminders по всем подписчикам."""
+    from app.services.senders import default_senders
+    from scripts.send_reminders import send_reminders
+    from scripts.replay_updates import percentile
+
+    latencies: List[float] = []
+
+    def timed(sender):
+        async def send(recipient: str, text: str):
+            started = time.perf_counter()
+            try:
+                return await sender(recipient, text)
+            finally:
+                latencies.append(time.perf_counter() - started)
+        return send
+
+    senders = {platform: timed(sender) for platform, sender in default_senders().items()}
+    started = time.perf_counter()
+    report = await send_reminders(senders=senders)
+    elapsed = time.perf_counter() - started
+    if report is None:
+        raise SystemExit("Напоминания не запланированы на сегодня: проверьте EVENT_DATE")
+    latencies.sort()
+    return {
+        "sent": report.sent,
+        "failed": report.failed,
+        "retries": report.retries,
+        "throughput": report.sent / elapsed * 60,
+        "p50_ms": percentile(latencies, 0.5) * 1000 if latencies else 0.0,
+        "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else 0.0,
+    }
+
+
+SCENARIOS = {
+    "handlers": bench_handlers,
+    "reminders": bench_reminders,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Один сценарий замера (обычно запускается из benchmarks.run)")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--active-users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    seed_seconds = _seed(args.users)
+    result = asyncio.run(SCENARIOS[args.scenario](args))
+    result.update(scenario=args.scenario, users=args.users, seed_seconds=seed_seconds, dialect=engine.dialect.name)
+    sys.stdout.write("\n" + json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Заполнение таблицы users синтетическими подписчиками для замеров."""
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.user import Base, User
+from app.utils.constants import Platform
+
+FIRST_USER_ID = 100000
+
+
+def reset_schema(db: Session) -> None:
+    """Пересоздаёт таблицы (только для отдельной базы замеров)."""
+    import app.models.delivery  # noqa: F401 - таблицы outbox и deliveries тоже пересоздаются
+    import app.models.outbox  # noqa: F401
+    from app.core.migrations import run_migrations
+
+    bind = db.get_bind()
+    Base.metadata.drop_all(bind=bind)
+    Base.metadata.create_all(bind=bind)
+    run_migrations(bind)
+
+
+def seed_users(db: Session, count: int, whatsapp_share: float = 0.2, batch_size: int = 20000) -> float:
+    """Вставляет `count` подписчиков пачками executemany. Возвращает время вставки, с.
+
+    Telegram-пользователи получают platform_user_id = FIRST_USER_ID + i, так что
+    synthetic_updates(first_user_id=FIRST_USER_ID) попадает в уже существующие строки.
+    """
+    whatsapp_every = round(1 / whatsapp_share) if whatsapp_share else 0
+    started = time.perf_counter()
+    for offset in range(0, count, batch_size):
+        rows = []
+        for i in range(offset, min(offset + batch_size, count)):
+            is_whatsapp = whatsapp_every and i % whatsapp_every == whatsapp_every - 1
+            rows.append({
+                "platform": Platform.WHATSAPP.value if is_whatsapp else Platform.TELEGRAM.value,
+                "platform_user_id": f"+7900{i:07d}" if is_whatsapp else str(FIRST_USER_ID + i),
+                "full_name": f"Bench User {i}",
+                "email": f"user{i}@example.com",
+                "phone": f"+7900{i:07d}",
+                "receive_reminders": True,
+            })
+        db.execute(insert(User), rows)
+        db.commit()
+    return time.perf_counter() - started
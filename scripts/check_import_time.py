@@ -0,0 +1,81 @@
+"""Проверка бюджета времени импорта точек входа (python -X importtime).
+
+Пример:
+    python -m scripts.check_import_time
+    python -m scripts.check_import_time --module scripts.send_reminders --budget-ms 250
+
+Для каждого модуля запускается отдельный интерпретатор; проверяется суммарное
+время импорта и то, что тяжёлые зависимости, которые модуль должен загружать
+лениво, не импортируются вовсе. Код выхода 1, если бюджет превышен.
+"""
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Модуль -> (бюджет, мс; зависимости, которые не должны импортироваться).
+# Бюджет в основном уходит на pydantic-settings (app.core.config).
+CHECKS: Dict[str, Tuple[float, List[str]]] = {
+    "scripts.send_reminders": (300.0, ["sqlalchemy", "telegram", "twilio", "aiohttp", "httpx"]),
+    "app.bot.send_reminders": (300.0, ["sqlalchemy", "telegram", "twilio", "aiohttp", "httpx"]),
+    "app.bot.telegram_bot": (1500.0, ["twilio", "aiohttp"]),
+}
+
+
+def measure(module: str, repeat: int) -> Tuple[float, Dict[str, float]]:
+    """Лучшее из `repeat` измерений: (общее время, мс; время по модулям верхнего уровня, мс)."""
+    best_total, best_modules = float("inf"), {}
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise SystemExit(f"Не удалось импортировать {module}:\n{result.stderr}")
+        modules: Dict[str, float] = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            if not cumulative.strip().isdigit():
+                continue  # заголовок таблицы
+            modules[name.strip()] = int(cumulative) / 1000
+        total = modules.get(module, 0.0)
+        if total < best_total:
+            best_total, best_modules = total, modules
+    return best_total, best_modules
+
+
+def check(module: str, budget_ms: float, forbidden: List[str], repeat: int) -> bool:
+    total, modules = measure(module, repeat)
+    loaded = [name for name in forbidden if name in modules]
+    ok = total <= budget_ms and not loaded
+    print(f"{'OK  ' if ok else 'FAIL'} {module}: {total:.0f} мс (бюджет {budget_ms:.0f} мс)")
+    if loaded:
+        print(f"     импортированы при загрузке: {', '.join(loaded)}")
+    if not ok:
+        heaviest = sorted(
+            ((ms, name) for name, ms in modules.items() if name.count(".") == 0 and name != module),
+            reverse=True,
+        )[:5]
+        print("     самые тяжёлые пакеты: " + ", ".join(f"{name} {ms:.0f} мс" for ms, name in heaviest))
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бюджет времени импорта точек входа")
+    parser.add_argument("--module", help="проверить один модуль из списка CHECKS")
+    parser.add_argument("--budget-ms", type=float, help="переопределить бюджет")
+    parser.add_argument("--repeat", type=int, default=3, help="запусков на модуль (берётся лучший)")
+    args = parser.parse_args()
+
+    checks = {args.module: CHECKS.get(args.module, (0.0, []))} if args.module else CHECKS
+    results = [
+        check(module, args.budget_ms or budget, forbidden, args.repeat)
+        for module, (budget, forbidden) in checks.items()
+    ]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
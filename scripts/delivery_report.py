@@ -0,0 +1,49 @@
+"""Отчёт по кампаниям рассылки из журнала доставок (таблица deliveries)
+и по получателям, отмеченным недоступными.
+
+Примеры:
+    python -m scripts.delivery_report
+    python -m scripts.delivery_report --campaign reminder:default
+"""
+import argparse
+
+from app.core.database import init_db, session_scope
+from app.services.deliveries import DeliveryService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Отчёт по кампаниям рассылки")
+    parser.add_argument("--campaign", default="", help="префикс кампании, например reminder:default")
+    parser.add_argument("--errors", type=int, default=5, help="сколько кодов ошибок показывать")
+    args = parser.parse_args()
+
+    init_db()
+    with session_scope() as db:
+        service = DeliveryService(db)
+        stats = service.campaign_stats(args.campaign)
+        unreachable = service.unreachable_counts()
+    if not stats:
+        print("Доставок не найдено.")
+    for item in stats:
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(item.statuses.items()))
+        latency = (
+            f"{item.avg_latency_ms:.0f} мс в среднем, максимум {item.max_latency_ms} мс"
+            if item.avg_latency_ms is not None else "нет данных"
+        )
+        print(item.campaign)
+        print(f"  статусы: {statuses}")
+        print(f"  время: {item.elapsed:.1f} с, скорость: {item.rate:.1f} сообщ./с")
+        print(f"  задержка API: {latency}")
+        if item.errors:
+            top = sorted(item.errors.items(), key=lambda pair: pair[1], reverse=True)[:args.errors]
+            print("  ошибки: " + ", ".join(f"{code} x{count}" for code, count in top))
+    if unreachable:
+        print("Недоступные получатели (пропускаются рассылками):")
+        for platform, reasons in sorted(unreachable.items()):
+            print(f"  {platform}: {sum(reasons.values())}")
+            for reason, count in sorted(reasons.items(), key=lambda pair: pair[1], reverse=True)[:args.errors]:
+                print(f"    {count:>7}  {reason}")
+
+
+if __name__ == "__main__":
+    main()
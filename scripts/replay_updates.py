@@ -0,0 +1,160 @@
+"""Локальный стенд для webhook: отправляет записанные обновления Telegram в FastAPI-приложение
+и измеряет задержку обработчиков без обращения к настоящему Bot API.
+
+Примеры:
+    python -m scripts.replay_updates --synthetic 1000 --concurrency 50
+    python -m scripts.replay_updates --file updates.jsonl
+
+Файл - JSONL, по одному объекту Update (как его присылает Telegram) на строку.
+Запросы к Bot API (sendMessage, editMessageText, ...) обслуживает локальная заглушка
+benchmarks.fake_servers с настраиваемой искусственной задержкой, запущенная в том же
+процессе. Используйте отдельную DATABASE_URL.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Iterator, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from benchmarks.fake_servers import FAKE_BOT_USER, start_fake_backends
+
+def synthetic_updates(count: int, users: int = 100, first_user_id: int = 100000) -> Iterator[dict]:
+    """/start и нажатия кнопок меню от `users` разных пользователей."""
+    buttons = ["info", "faq", "contact", "register_site", "reminders_on", "reminders_off"]
+    now = int(time.time())
+    for i in range(count):
+        user_id = first_user_id + i % users
+        user = {"id": user_id, "is_bot": False, "first_name": "Test"}
+        chat = {"id": user_id, "type": "private"}
+        if i < users:
+            yield {
+                "update_id": i + 1,
+                "message": {
+                    "message_id": i + 1, "date": now, "chat": chat, "from": user, "text": "/start",
+                    "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+                },
+            }
+        else:
+            yield {
+                "update_id": i + 1,
+                "callback_query": {
+                    "id": str(i), "from": user, "chat_instance": str(user_id),
+                    "data": buttons[i % len(buttons)],
+                    "message": {"message_id": 1, "date": now, "chat": chat, "from": FAKE_BOT_USER, "text": "menu"},
+                },
+            }
+
+
+def load_updates(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# Планировщик напоминаний и антифлуд искажают замер: первый рассылает реальные волны
+# в DATABASE_URL стенда, второй отбрасывает синтетические нажатия одного пользователя.
+REPLAY_OVERRIDES = {"REMINDER_SCHEDULER_ENABLED": False, "FLOOD_MIN_INTERVAL": 0.0}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def replay(updates: List[dict], concurrency: int, bot_api_url: Optional[str] = None) -> dict:
+    """Прогоняет обновления через webhook и возвращает задержки и пропускную способность.
+
+    bot_api_url - адрес заглушки Bot API вместо settings.TELEGRAM_API_BASE_URL
+    (с ней подходит любой токен). На время прогона действуют REPLAY_OVERRIDES.
+    """
+    overrides = dict(REPLAY_OVERRIDES)
+    if bot_api_url:
+        overrides.update(TELEGRAM_API_BASE_URL=bot_api_url, TELEGRAM_BOT_TOKEN=settings.TELEGRAM_BOT_TOKEN or "1:replay")
+    saved = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    try:
+        return await _replay(updates, concurrency)
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+async def replay_with_fake_bot_api(updates: List[dict], concurrency: int, latency: float = 0.0) -> dict:
+    """replay() с заглушкой Bot API в этом же event loop; в результате - число принятых ею вызовов."""
+    runner, base_url, fake_app = await start_fake_backends(latency)
+    try:
+        result = await replay(updates, concurrency, f"{base_url}/bot")
+    finally:
+        await runner.cleanup()
+    result["bot_api_calls"] = fake_app["stats"]["accepted"]
+    return result
+
+
+async def _replay(updates: List[dict], concurrency: int) -> dict:
+    from app.bot.telegram_bot import build_application
+    from app.bot.webhook import create_app
+    from app.core.database import init_db
+
+    # Как app.bot.webhook.main(): в режиме webhook build_application не мигрирует базу
+    init_db()
+    app = create_app(build_application(webhook=True))
+    headers = {}
+    if settings.TELEGRAM_WEBHOOK_SECRET:
+        headers["X-Telegram-Bot-Api-Secret-Token"] = settings.TELEGRAM_WEBHOOK_SECRET
+
+    latencies: List[float] = []
+    errors = 0
+    pending = iter(updates)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+
+            async def worker() -> None:
+                nonlocal errors
+                for update in pending:
+                    started = time.perf_counter()
+                    response = await client.post(settings.TELEGRAM_WEBHOOK_PATH, json=update, headers=headers)
+                    latencies.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        errors += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "updates": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Воспроизведение обновлений Telegram через webhook")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="JSONL с записанными обновлениями")
+    source.add_argument("--synthetic", type=int, help="сгенерировать N обновлений")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--bot-api-latency", type=float, default=0.0, help="задержка ответа Bot API, с")
+    args = parser.parse_args()
+
+    updates = load_updates(args.file) if args.file else list(synthetic_updates(args.synthetic))
+    result = asyncio.run(replay_with_fake_bot_api(updates, args.concurrency, args.bot_api_latency))
+    print(f"Обновлений: {result['updates']}, ошибок: {result['errors']}, вызовов Bot API: {result['bot_api_calls']}")
+    print(f"Пропускная способность: {result['throughput']:.1f} обновл./с")
+    print(
+        f"Задержка, мс: p50={result['p50_ms']:.2f} "
+        f"p99={result['p99_ms']:.2f} max={result['max_ms']:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
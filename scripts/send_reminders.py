@@ -1,122 +1,202 @@
+import argparse
 import asyncio
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from typing import TYPE_CHECKING, Optional
 from app.core.config import settings
-from app.core.database import get_db, init_db
-from app.models.user import User
-from app.utils.constants import Platform
-from telegram import Bot # Импортируем Bot для отправки сообщений
-from twilio.rest import Client # Импортируем Client для WhatsApp
-
-# Initialize database
-init_db()
-
-# Инициализируем бота Telegram
-bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
+from app.core.content import ContentUnavailable, content_store
+from app.core.logs import setup_logging
+from app.services.reminder_calendar import reminder_calendar
+from app.utils.dates import local_now
+
+if TYPE_CHECKING:
+    from app.services.dispatcher import DispatchReport
+
+# SQLAlchemy, клиенты Telegram/Twilio и диспетчер импортируются только когда
+# сегодня есть рассылка: в остальные дни cron-запуск укладывается в бюджет
+# scripts/check_import_time.py
+
+PROGRESS_INTERVAL = 5  # секунд между строками прогресса координатора
+
+
+def shard_budget(shards: int, shard_index: int):
+    """Лимиты частоты и номер WhatsApp для шарда.
+
+    Лимит Telegram общий для токена бота и делится поровну между шардами;
+    номера TWILIO_PHONE_NUMBERS раздаются шардам по кругу, и лимит TWILIO_RATE
+    каждого номера делят только шарды, которые через него отправляют.
+    """
+    from app.services.dispatcher import default_limits
+
+    numbers = settings.twilio_sender_numbers
+    slot = shard_index % len(numbers)
+    sharing_number = sum(1 for index in range(shards) if index % len(numbers) == slot)
+    limits = default_limits(telegram_share=1 / shards, whatsapp_share=1 / sharing_number)
+    return limits, numbers[slot]
+
+
+async def _report_progress(report, progress, shard_index: int) -> None:
+    while True:
+        await asyncio.sleep(1)
+        progress.put((shard_index, report.sent, report.failed, report.retries, report.unreachable, False))
+
+
+async def send_reminders(
+    retry_unconfirmed: bool = False,
+    senders=None,
+    shards: int = 1,
+    shard_index: int = 0,
+    progress=None,
+    migrate: bool = True,
+) -> Optional["DispatchReport"]:
+    """Отправляет напоминания пользователям и возвращает отчёт (None - сегодня отправлять нечего).
+
+    senders - отправители по платформам (по умолчанию default_senders(); подменяются в benchmarks/);
+    shards/shard_index - отправлять только получателям с id % shards == shard_index;
+    progress - очередь multiprocessing, куда шард раз в секунду пишет свои счётчики;
+    migrate=False - не вызывать init_db() (шарды: миграции уже выполнил coordinate() или --migrate-only).
+    """
+    # Мероприятия берутся из того же источника контента, что и у бота
+    # (ContentUnavailable, если файл контента не загружен); "сегодня" - в часовом поясе мероприятия
+    content = content_store.reminder_content()
+    today = local_now(settings.EVENT_TIMEZONE).date()
+    due = reminder_calendar(content).due(today)
+    if not due:
+        # Ни базы, ни пользователей не трогаем
+        if not content.dated_events:
+            print("Ни у одного мероприятия нет разбираемой даты, проверьте EVENT_DATE / файл контента.")
+        else:
+            print("Сегодня напоминаний нет.")
+        return
 
-# Инициализируем клиент Twilio для WhatsApp
-twilio_client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+    from app.core.database import init_db
+    from app.services.dispatcher import DispatchReport
+    from app.services.reminders import Shard, send_reminder_wave
+    from app.services.senders import close_senders, default_senders
 
-async def send_telegram_message(chat_id: str, message: str):
-    """Отправляет сообщение пользователю Telegram."""
+    if migrate:
+        init_db()
+    limits, whatsapp_from = shard_budget(shards, shard_index)
+    report = DispatchReport()
+    reporter = asyncio.create_task(_report_progress(report, progress, shard_index)) if progress else None
     try:
-        await bot.send_message(chat_id=chat_id, text=message)
+        senders = senders or default_senders(whatsapp_from=whatsapp_from)
+        # Этапы нескольких мероприятий в один день отправляются по очереди в общий отчёт
+        for stage, event in due:
+            await send_reminder_wave(
+                stage, event, senders, retry_unconfirmed,
+                shard=Shard(shard_index, shards), limits=limits, report=report,
+            )
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        await close_senders()
+    if progress is not None:
+        progress.put((shard_index, report.sent, report.failed, report.retries, report.unreachable, True))
+    print(report.summary())
+    return report
+
+
+def _run_shard(shards: int, shard_index: int, retry_unconfirmed: bool, progress) -> None:
+    """Точка входа процесса-шарда: свой event loop, пул соединений БД и HTTP-клиенты."""
+    setup_logging()
+    # Миграции (DDL) не должны выполняться в N процессах одновременно над одной базой
+    asyncio.run(send_reminders(
+        retry_unconfirmed, shards=shards, shard_index=shard_index, progress=progress, migrate=False,
+    ))
+
+
+def coordinate(shards: int, retry_unconfirmed: bool) -> bool:
+    """Запускает шарды в отдельных процессах и печатает суммарный прогресс. True - все шарды успешны."""
+    import multiprocessing
+    import queue
+    import time
+
+    if not reminder_calendar(content_store.reminder_content()).due(local_now(settings.EVENT_TIMEZONE).date()):
+        print("Сегодня напоминаний нет.")
         return True
-    except Exception as e:
-        print(f"Ошибка при отправке сообщения Telegram пользователю {chat_id}: {e}")
-        return False
-
-def send_whatsapp_message(to_number: str, message: str) -> bool:
-    """Отправляет сообщение пользователю WhatsApp через Twilio."""
-    try:
-        # Twilio требует номер в формате "whatsapp:+номер"
-        message = twilio_client.messages.create(
-            from_=f"whatsapp:{settings.TWILIO_PHONE_NUMBER}",
-            body=message,
-            to=f"whatsapp:{to_number}"
+    # Миграции выполняются один раз до старта шардов, а не параллельно в каждом
+    from app.core.database import init_db
+    init_db()
+
+    context = multiprocessing.get_context("spawn")
+    progress = context.Queue()
+    processes = [
+        context.Process(target=_run_shard, args=(shards, index, retry_unconfirmed, progress), name=f"shard-{index}")
+        for index in range(shards)
+    ]
+    for process in processes:
+        process.start()
+
+    counters = {}
+    started = last_print = time.monotonic()
+
+    def print_progress() -> None:
+        sent = sum(c[0] for c in counters.values())
+        failed = sum(c[1] for c in counters.values())
+        retries = sum(c[2] for c in counters.values())
+        unreachable = sum(c[3] for c in counters.values())
+        finished = sum(1 for c in counters.values() if c[4])
+        elapsed = time.monotonic() - started
+        print(
+            f"Прогресс: шардов завершено {finished}/{shards}, отправлено {sent}, ошибок {failed} "
+            f"(недоступны: {unreachable}), повторов {retries}, скорость {sent / elapsed if elapsed else 0:.1f} сообщ./с",
+            flush=True,
         )
-        print(f"Сообщение WhatsApp отправлено пользователю {to_number}. SID: {message.sid}")
-        return True
-    except Exception as e:
-        print(f"Ошибка при отправке сообщения WhatsApp пользователю {to_number}: {e}")
-        return False
-
-def get_users_for_reminders(db: Session) -> list[User]:
-    """Получает список пользователей, подписанных на напоминания."""
-    return db.query(User).filter(
-        User.receive_reminders == True
-    ).all()
-
-async def send_reminders():
-    """Отправляет напоминания пользователям."""
-    db = next(get_db())
-    users_to_notify = get_users_for_reminders(db)
-
-    event_date_str = settings.EVENT_DATE # Дата события из настроек
-    try:
-        event_date = datetime.strptime(event_date_str, "%d %B %Y")
-    except ValueError:
-        print(f"Ошибка парсинга даты события: {event_date_str}. Проверьте формат в settings.EVENT_DATE.")
-        db.close()
-        return
 
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-
-    # Расчет дат напоминаний
-    date_week_before = event_date - timedelta(days=7)
-    date_3days_before = event_date - timedelta(days=3)
-    date_1day_before = event_date - timedelta(days=1)
-
-    # Тексты напоминаний (можно вынести в настройки/константы)
-    reminder_messages = {
-        "week": f"Напоминание! До ESG TECH Forum осталась неделя! Форум состоится {event_date_str}. Подробности: {settings.EVENT_LINK}",
-        "3days": f"Напоминание! До ESG TECH Forum осталось 3 дня! Форум состоится {event_date_str}. Подробности: {settings.EVENT_LINK}",
-        "1day": f"Последнее напоминание! ESG TECH Forum завтра! {event_date_str} в {settings.EVENT_LOCATION}. Подробности: {settings.EVENT_LINK}"
-    }
-
-    for user in users_to_notify:
-        # Напоминание за неделю
-        if today == date_week_before.replace(hour=0, minute=0, second=0, microsecond=0) and not user.reminder_sent_week:
-            if user.platform == Platform.TELEGRAM:
-                if await send_telegram_message(user.platform_user_id, reminder_messages["week"]):
-                    user.reminder_sent_week = True
-                    db.commit()
-                    print(f"Отправлено напоминание за неделю пользователю {user.platform_user_id} ({user.platform})")
-            elif user.platform == Platform.WHATSAPP:
-                if send_whatsapp_message(user.platform_user_id, reminder_messages["week"]):
-                    user.reminder_sent_week = True
-                    db.commit()
-                    print(f"Отправлено напоминание за неделю пользователю {user.platform_user_id} ({user.platform})")
-
-        # Напоминание за 3 дня
-        if today == date_3days_before.replace(hour=0, minute=0, second=0, microsecond=0) and not user.reminder_sent_3days:
-            if user.platform == Platform.TELEGRAM:
-                if await send_telegram_message(user.platform_user_id, reminder_messages["3days"]):
-                    user.reminder_sent_3days = True
-                    db.commit()
-                    print(f"Отправлено напоминание за 3 дня пользователю {user.platform_user_id} ({user.platform})")
-            elif user.platform == Platform.WHATSAPP:
-                if send_whatsapp_message(user.platform_user_id, reminder_messages["3days"]):
-                    user.reminder_sent_3days = True
-                    db.commit()
-                    print(f"Отправлено напоминание за 3 дня пользователю {user.platform_user_id} ({user.platform})")
-
-        # Напоминание за 1 день
-        if today == date_1day_before.replace(hour=0, minute=0, second=0, microsecond=0) and not user.reminder_sent_1day:
-            if user.platform == Platform.TELEGRAM:
-                if await send_telegram_message(user.platform_user_id, reminder_messages["1day"]):
-                    user.reminder_sent_1day = True
-                    db.commit()
-                    print(f"Отправлено напоминание за 1 день пользователю {user.platform_user_id} ({user.platform})")
-            elif user.platform == Platform.WHATSAPP:
-                if send_whatsapp_message(user.platform_user_id, reminder_messages["1day"]):
-                    user.reminder_sent_1day = True
-                    db.commit()
-                    print(f"Отправлено напоминание за 1 день пользователю {user.platform_user_id} ({user.platform})")
-
-    db.close()
+    while any(process.is_alive() for process in processes) or not progress.empty():
+        try:
+            index, sent, failed, retries, unreachable, done = progress.get(timeout=1)
+            counters[index] = (sent, failed, retries, unreachable, done)
+        except queue.Empty:
+            pass
+        if time.monotonic() - last_print >= PROGRESS_INTERVAL:
+            print_progress()
+            last_print = time.monotonic()
+
+    for process in processes:
+        process.join()
+    print_progress()
+    failed_shards = [process.name for process in processes if process.exitcode != 0]
+    if failed_shards:
+        print(f"Шарды завершились с ошибкой: {', '.join(failed_shards)}")
+    return not failed_shards
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Отправка напоминаний о форуме")
+    parser.add_argument(
+        "--retry-unconfirmed", action="store_true",
+        help="повторно отправить напоминания, прерванные в предыдущем запуске",
+    )
+    parser.add_argument("--shards", type=int, default=1, help="на сколько частей делить получателей")
+    parser.add_argument(
+        "--shard-index", type=int,
+        help="отправить только эту часть (0..shards-1); без него при --shards > 1 "
+             "все части запускаются отдельными процессами. Миграции такой запуск не выполняет: "
+             "перед шардами на разных хостах один раз запустите --migrate-only",
+    )
+    parser.add_argument("--migrate-only", action="store_true", help="выполнить миграции базы и выйти")
+    args = parser.parse_args()
+    if args.shards < 1 or (args.shard_index is not None and not 0 <= args.shard_index < args.shards):
+        parser.error("нужно --shards >= 1 и 0 <= --shard-index < --shards")
+    setup_logging()
+    if args.migrate_only:
+        from app.core.database import init_db
+        init_db()
+        print("Миграции выполнены.")
+        raise SystemExit(0)
     print("Запуск скрипта отправки напоминаний...")
-    asyncio.run(send_reminders())
-    print("Скрипт отправки напоминаний завершен.") 
\ No newline at end of file
+    try:
+        if args.shards > 1 and args.shard_index is None:
+            ok = coordinate(args.shards, args.retry_unconfirmed)
+        else:
+            # Шарды с --shard-index запускаются параллельно, и DDL в каждом из них гонялся бы с остальными
+            asyncio.run(send_reminders(
+                args.retry_unconfirmed, shards=args.shards, shard_index=args.shard_index or 0,
+                migrate=args.shard_index is None,
+            ))
+            ok = True
+    except ContentUnavailable as e:
+        print(f"Рассылка не запущена: {e}")
+        ok = False
+    print("Скрипт отправки напоминаний завершен.")
+    if not ok:
+        raise SystemExit(1)
@@ -0,0 +1,216 @@
+"""Импорт и экспорт подписчиков (таблица users) в CSV/JSONL потоком, порциями.
+
+Примеры:
+    python -m scripts.subscribers import attendees.csv --subscribe
+    python -m scripts.subscribers import attendees.jsonl --platform whatsapp
+    python -m scripts.subscribers export subscribers.csv
+    python -m scripts.subscribers export - --format jsonl --subscribed-only | gzip > dump.jsonl.gz
+
+Колонки импорта: platform, platform_user_id (обязательны; platform можно задать
+--platform), full_name, email, phone, is_registered, receive_reminders, deliveries.
+У существующих пользователей обновляются только колонки, присутствующие в файле.
+deliveries - статусы доставок {кампания: статус} (в CSV - JSON в ячейке), как их
+выгружает export; указанные кампании перезаписываются в таблице deliveries,
+остальные не меняются. Формат определяется по расширению
+(.csv / .jsonl / .ndjson) или задаётся --format.
+Кэш состояния пользователей в процессе бота обновится по USER_CACHE_TTL.
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+from app.core.database import init_db, session_scope
+from app.services.subscribers import (
+    DELIVERIES_FIELD, DELIVERY_STATUSES, EXPORT_FIELDS, IMPORT_FIELDS, SubscriberService,
+)
+from app.utils.constants import Platform
+
+BOOL_FIELDS = {"is_registered", "receive_reminders"}
+TRUE_VALUES = {"1", "true", "yes", "y", "да", "+"}
+PLATFORMS = {platform.value for platform in Platform}
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(path: str, explicit: Optional[str]) -> str:
+    if explicit:
+        return explicit
+    return "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Union[Dict, str]]]:
+    """(номер строки, запись) без загрузки файла целиком.
+
+    Строки JSONL отдаются как есть и разбираются в normalize: ошибка в одной строке
+    пропускает её, а не прерывает генератор и весь импорт.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(stream, 1):
+            if line.strip():
+                yield line_number, line
+
+
+def decode_record(record: Union[Dict, str]) -> Dict:
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError as e:
+            raise RowError(f"не JSON: {e}")
+    if not isinstance(record, dict):
+        raise RowError(f"ожидался объект, получено {type(record).__name__}")
+    return record
+
+
+def normalize(record: Union[Dict, str], default_platform: Optional[str], subscribe: bool) -> Dict:
+    record = decode_record(record)
+    platform = str(record.get("platform") or default_platform or "").strip().lower()
+    if platform not in PLATFORMS:
+        raise RowError(f"неизвестная платформа {platform!r}")
+    platform_user_id = str(record.get("platform_user_id") or "").strip()
+    if not platform_user_id:
+        raise RowError("пустой platform_user_id")
+    if platform == Platform.WHATSAPP.value:
+        platform_user_id = platform_user_id.removeprefix("whatsapp:")
+    row = {"platform": platform, "platform_user_id": platform_user_id}
+    for field in IMPORT_FIELDS:
+        value = record.get(field)
+        if value is None or value == "":
+            continue
+        if field in BOOL_FIELDS:
+            row[field] = value if isinstance(value, bool) else str(value).strip().lower() in TRUE_VALUES
+        else:
+            row[field] = str(value).strip()
+    deliveries = record.get(DELIVERIES_FIELD)
+    if deliveries:
+        row[DELIVERIES_FIELD] = parse_deliveries(deliveries)
+    if subscribe:
+        row["receive_reminders"] = True
+    return row
+
+
+def parse_deliveries(value) -> Dict[str, str]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise RowError(f"deliveries не JSON: {value!r}")
+    if not isinstance(value, dict):
+        raise RowError("deliveries должен быть объектом {кампания: статус}")
+    unknown = {status for status in value.values() if status not in DELIVERY_STATUSES}
+    if unknown:
+        raise RowError(f"неизвестные статусы доставки {sorted(map(str, unknown))}")
+    return {str(campaign): status for campaign, status in value.items()}
+
+
+def import_file(args) -> None:
+    fmt = detect_format(args.path, args.format)
+    imported = skipped = 0
+    started = time.perf_counter()
+    stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8-sig", newline="")
+    try:
+        records = read_records(stream, fmt)
+        with session_scope() as db:
+            service = SubscriberService(db)
+            while True:
+                batch = list(itertools.islice(records, args.chunk_size))
+                if not batch:
+                    break
+                chunk: List[Dict] = []
+                for line_number, record in batch:
+                    try:
+                        chunk.append(normalize(record, args.platform, args.subscribe))
+                    except RowError as e:
+                        skipped += 1
+                        if skipped <= 10:
+                            print(f"Строка {line_number} пропущена: {e}", file=sys.stderr)
+                imported += service.upsert_many(chunk)
+                print(f"Загружено: {imported}", file=sys.stderr)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    elapsed = time.perf_counter() - started
+    print(
+        f"Импорт завершён: записано {imported}, пропущено {skipped}, "
+        f"{elapsed:.1f} с ({imported / elapsed if elapsed else 0:.0f} строк/с)"
+    )
+
+
+def _plain(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _csv_value(value):
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False) if value else ""
+    return _plain(value)
+
+
+def export_file(args) -> None:
+    fmt = detect_format(args.path, args.format)
+    exported = 0
+    started = time.perf_counter()
+    if args.path == "-":
+        stream = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="", write_through=False)
+    else:
+        stream = open(args.path, "w", encoding="utf-8", newline="")
+    try:
+        writer = csv.writer(stream) if fmt == "csv" else None
+        if writer is not None:
+            writer.writerow(EXPORT_FIELDS)
+        with session_scope() as db:
+            for chunk in SubscriberService(db).iter_export_chunks(args.chunk_size, args.subscribed_only):
+                if writer is not None:
+                    writer.writerows([_csv_value(row[field]) for field in EXPORT_FIELDS] for row in chunk)
+                else:
+                    stream.writelines(
+                        json.dumps(row, ensure_ascii=False, default=_plain) + "\n" for row in chunk
+                    )
+                exported += len(chunk)
+    finally:
+        stream.flush()
+        if args.path != "-":
+            stream.close()
+    elapsed = time.perf_counter() - started
+    print(
+        f"Экспорт завершён: {exported} строк, {elapsed:.1f} с ({exported / elapsed if elapsed else 0:.0f} строк/с)",
+        file=sys.stderr,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Импорт и экспорт подписчиков")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="загрузить CSV/JSONL в users")
+    import_parser.add_argument("path", help="файл или - для stdin")
+    import_parser.add_argument("--format", choices=["csv", "jsonl"])
+    import_parser.add_argument("--platform", choices=sorted(PLATFORMS), help="платформа для строк без колонки platform")
+    import_parser.add_argument("--subscribe", action="store_true", help="включить напоминания всем загруженным")
+    import_parser.add_argument("--chunk-size", type=int, default=5000)
+    import_parser.set_defaults(handler=import_file)
+
+    export_parser = commands.add_parser("export", help="выгрузить users в CSV/JSONL")
+    export_parser.add_argument("path", help="файл или - для stdout")
+    export_parser.add_argument("--format", choices=["csv", "jsonl"])
+    export_parser.add_argument("--subscribed-only", action="store_true", help="только receive_reminders")
+    export_parser.add_argument("--chunk-size", type=int, default=5000)
+    export_parser.set_defaults(handler=export_file)
+
+    args = parser.parse_args()
+    init_db()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
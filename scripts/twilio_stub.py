@@ -0,0 +1,65 @@
+"""Локальная заглушка Twilio Messages API для тестов и замеров пропускной способности WhatsApp.
+
+Запуск:
+    python -m scripts.twilio_stub --port 8099 --latency 0.05 --rate-limit-ratio 0.01
+и затем TWILIO_API_BASE_URL=http://127.0.0.1:8099 для отправителя.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+
+from aiohttp import web
+
+
+def create_stub_app(latency: float = 0.0, rate_limit_ratio: float = 0.0) -> web.Application:
+    """aiohttp-приложение, отвечающее как POST /2010-04-01/Accounts/{sid}/Messages.json.
+
+    latency - задержка ответа, с; rate_limit_ratio - доля ответов 429 (код Twilio 20429).
+    Счётчики доступны в app["stats"].
+    """
+    stats = {"accepted": 0, "rate_limited": 0}
+    sids = itertools.count(1)
+
+    async def create_message(request: web.Request) -> web.Response:
+        form = await request.post()
+        if latency:
+            await asyncio.sleep(latency)
+        if rate_limit_ratio and random.random() < rate_limit_ratio:
+            stats["rate_limited"] += 1
+            return web.json_response(
+                {"code": 20429, "message": "Too Many Requests", "status": 429},
+                status=429, headers={"Retry-After": "1"},
+            )
+        stats["accepted"] += 1
+        return web.json_response({
+            "sid": f"SM{next(sids):032d}",
+            "status": "queued",
+            "to": form.get("To"),
+            "from": form.get("From"),
+            "body": form.get("Body"),
+        }, status=201)
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.Response(text=json.dumps(stats), content_type="application/json")
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_post("/2010-04-01/Accounts/{sid}/Messages.json", create_message)
+    app.router.add_get("/stats", get_stats)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Заглушка Twilio Messages API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    args = parser.parse_args()
+    web.run_app(create_stub_app(args.latency, args.rate_limit_ratio), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()